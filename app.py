@@ -1,19 +1,124 @@
-import dash
-from dash import dcc, html, Input, Output, State, callback, ctx
-import dash_bootstrap_components as dbc
-import plotly.graph_objects as go
-import plotly.express as px
-import plotly.io as pio
-from src.services import data_service
-import pandas as pd
-
-app = dash.Dash(
-    __name__,
-    external_stylesheets=[dbc.themes.BOOTSTRAP, dbc.icons.FONT_AWESOME],
-    suppress_callback_exceptions=True
-)
+import argparse
+import importlib.util
+import sys
+import threading
+from src.cache import LRUCache
+from src.startup import StartupProfile
+
+# plotly.express, pandas and the data service are imported on first use (or by
+# the prewarm thread), so the server can answer health checks straight away
+startup_profile = StartupProfile()
+
+with startup_profile.phase("import dash"):
+    import dash
+    from dash import dcc, html, Input, Output, State, callback, ctx
+    import dash_bootstrap_components as dbc
+    import plotly.graph_objects as go
+
+with startup_profile.phase("create app"):
+    app = dash.Dash(
+        __name__,
+        external_stylesheets=[dbc.themes.BOOTSTRAP, dbc.icons.FONT_AWESOME],
+        suppress_callback_exceptions=True,
+        # gzip responses when flask-compress (dash[compress]) is installed
+        compress=importlib.util.find_spec("flask_compress") is not None
+    )
 
 server = app.server
+data_ready = threading.Event()
+
+DEFAULT_NUTRIENT = 'protein'
+NUTRIENT_OPTIONS = [
+    {'label': '💪 Protein', 'value': 'protein'},
+    {'label': '🧂 Sodium', 'value': 'sodium'},
+    {'label': '🥓 Saturated Fat', 'value': 'saturated_fat'},
+    {'label': '🍬 Sugars', 'value': 'sugars'},
+    {'label': '🌾 Fiber', 'value': 'fiber'},
+]
+# Serialized figure JSON kept across callbacks, bounded by total bytes
+FIGURE_CACHE_BYTES = 32 * 1024 * 1024
+figure_cache = LRUCache(FIGURE_CACHE_BYTES, len)
+# (tab, graph id) -> (bytes of plain figure JSON, bytes sent) for the last build
+payload_sizes = {}
+PAYLOAD_REPORT = False
+
+# Large-data mode: above LARGE_DATA_POINTS items the scatter switches to WebGL
+# and the ternary plot is downsampled; above DENSITY_POINTS the scatter
+# becomes a server-side density grid. Both can be set from the command line.
+LARGE_DATA_POINTS = 5_000
+DENSITY_POINTS = 100_000
+
+
+def health_check_middleware(wsgi_app, path="/healthz"):
+    """
+    Answers `path` before Flask sees the request.
+    Dash's first-request setup renders the layout (and so loads the data) on
+    any route, so a Flask route alone would block the first health check.
+    `ready` turns true once prewarm has finished, or with --lazy once the
+    data is first loaded; `version` is the current dataset version (0 until
+    the data is loaded).
+    """
+    def middleware(environ, start_response):
+        if environ.get('PATH_INFO') != path:
+            return wsgi_app(environ, start_response)
+        services = sys.modules.get('src.services')
+        version = services.data_service.version if services is not None else 0
+        body = b'{"status": "ok", "ready": %s, "version": %d}' % (
+            b'true' if data_ready.is_set() else b'false', version)
+        start_response('200 OK', [('Content-Type', 'application/json'),
+                                  ('Content-Length', str(len(body)))])
+        return [body]
+    return middleware
+
+
+server.wsgi_app = health_check_middleware(server.wsgi_app)
+
+
+def prewarm(report: bool = False, figures: bool = False, exports: bool = False):
+    """
+    Loads the data, its derived indexes and the plotting imports ahead of the
+    first request; with figures, also renders the default view of every tab,
+    and with exports, starts the image export workers.
+    """
+    with startup_profile.phase("import data service"):
+        from src.services import data_service
+    with startup_profile.phase("load data"):
+        data_service.analysis
+    with startup_profile.phase("build dataframe"):
+        data_service.df
+    with startup_profile.phase("build moment index"):
+        data_service.moments
+    with startup_profile.phase("import plotly.express"):
+        import plotly.express  # noqa: F401
+    if figures:
+        with startup_profile.phase("prewarm figures"):
+            prewarm_figures()
+    if exports:
+        with startup_profile.phase("start export workers"):
+            from src.graph_exports import graph_renderer
+            graph_renderer.start()
+    data_ready.set()
+    if report:
+        print(startup_profile.report(), flush=True)
+
+
+def start_data_watch(interval: float = 2.0) -> threading.Thread:
+    """
+    Reloads the dataset whenever data/fastfood.csv changes. The new version
+    is built on the watcher thread and swapped in once complete.
+    """
+    def watch():
+        from src.services import data_service
+        data_service.watch(interval)
+    thread = threading.Thread(target=watch, name="start data watch", daemon=True)
+    thread.start()
+    return thread
+
+
+def start_prewarm(report: bool = False, figures: bool = False, exports: bool = False) -> threading.Thread:
+    thread = threading.Thread(target=prewarm, args=(report, figures, exports), name="prewarm", daemon=True)
+    thread.start()
+    return thread
 
 colors = {
     'primary': '#2E86AB',
@@ -38,108 +143,129 @@ navbar = dbc.Navbar(
     className="mb-4"
 )
 
-stats = data_service.get_stats()
-restaurant_scores = data_service.get_restaurant_scores()
-
 welcome_alert = dbc.Alert([
     html.H5([html.I(className="fas fa-info-circle me-2"), "Welcome to the Fast Food Nutrition Dashboard"], className="alert-heading"),
     html.P("Explore nutritional data from 8 major fast food restaurants. Use the filters below to customize your view, then click on the tabs to see different visualizations and analyses.", className="mb-0")
 ], color="info", className="mb-4")
 
-stats_cards = dbc.Row([
-    dbc.Col(dbc.Card([
-        dbc.CardBody([
-            html.H4([html.I(className="fas fa-utensils me-2"), "Total Items"]),
-            html.H2(f"{stats['total_items']:,}", className="text-primary")
-        ])
-    ], className="text-center shadow-sm"), md=3),
-    dbc.Col(dbc.Card([
-        dbc.CardBody([
-            html.H4([html.I(className="fas fa-store me-2"), "Restaurants"]),
-            html.H2(f"{stats['total_restaurants']}", className="text-success")
-        ])
-    ], className="text-center shadow-sm"), md=3),
-    dbc.Col(dbc.Card([
-        dbc.CardBody([
-            html.H4([html.I(className="fas fa-fire me-2"), "Avg Calories"]),
-            html.H2(f"{stats['avg_calories']:.0f}", className="text-warning")
-        ])
-    ], className="text-center shadow-sm"), md=3),
-    dbc.Col(dbc.Card([
+def make_stats_cards(stats):
+    return dbc.Row([
+        dbc.Col(dbc.Card([
+            dbc.CardBody([
+                html.H4([html.I(className="fas fa-utensils me-2"), "Total Items"]),
+                html.H2(f"{stats['total_items']:,}", className="text-primary")
+            ])
+        ], className="text-center shadow-sm"), md=3),
+        dbc.Col(dbc.Card([
+            dbc.CardBody([
+                html.H4([html.I(className="fas fa-store me-2"), "Restaurants"]),
+                html.H2(f"{stats['total_restaurants']}", className="text-success")
+            ])
+        ], className="text-center shadow-sm"), md=3),
+        dbc.Col(dbc.Card([
+            dbc.CardBody([
+                html.H4([html.I(className="fas fa-fire me-2"), "Avg Calories"]),
+                html.H2(f"{stats['avg_calories']:.0f}", className="text-warning")
+            ])
+        ], className="text-center shadow-sm"), md=3),
+        dbc.Col(dbc.Card([
+            dbc.CardBody([
+                html.H4([html.I(className="fas fa-drumstick-bite me-2"), "Avg Protein"]),
+                html.H2(f"{stats['avg_protein']:.1f}g", className="text-info")
+            ])
+        ], className="text-center shadow-sm"), md=3),
+    ], className="mb-4")
+
+# Links to the streaming /export/data route: (element id, label, format, with scores)
+DATA_EXPORT_LINKS = [
+    (f"export-{fmt}{'-scores' if scores else ''}", label, fmt, scores)
+    for scores in (False, True)
+    for fmt, label in [('csv', "CSV (gzip)"), ('parquet', "Parquet"), ('arrow', "Arrow IPC")]
+]
+# Links to the streaming /export/charts route: (element id, label, image format)
+CHART_BUNDLE_LINKS = [
+    ('download-all-png', "PNG images", 'png'),
+    ('download-all-svg', "SVG images", 'svg'),
+]
+
+
+def make_export_menu():
+    items = []
+    for element_id, label, fmt, scores in DATA_EXPORT_LINKS:
+        if scores and fmt == 'csv':
+            items += [dbc.DropdownMenuItem(divider=True),
+                      dbc.DropdownMenuItem("With health scores", header=True)]
+        items.append(dbc.DropdownMenuItem(label, id=element_id, external_link=True))
+    return dbc.DropdownMenu(items, label=html.Span([html.I(className="fas fa-file-export me-2"), "Export Data"]),
+                            color="primary", size="sm", className="d-inline-block")
+
+
+def make_controls_panel(stats, restaurants):
+    return dbc.Card([
+        dbc.CardHeader(html.H5([html.I(className="fas fa-sliders-h me-2"), "Customize Your View"])),
         dbc.CardBody([
-            html.H4([html.I(className="fas fa-drumstick-bite me-2"), "Avg Protein"]),
-            html.H2(f"{stats['avg_protein']:.1f}g", className="text-info")
+            dbc.Row([
+                dbc.Col([
+                    html.Label([html.I(className="fas fa-store me-1"), "Restaurant"], className="fw-bold mb-2"),
+                    html.Small("Filter by specific restaurant or view all", className="text-muted d-block mb-2"),
+                    dcc.Dropdown(
+                        id='restaurant-filter',
+                        options=[{'label': 'All Restaurants', 'value': 'ALL'}] + 
+                                [{'label': r, 'value': r} for r in restaurants],
+                        value='ALL',
+                        multi=False,
+                        placeholder="Choose a restaurant..."
+                    ),
+                ], md=4),
+                dbc.Col([
+                    html.Label([html.I(className="fas fa-fire me-1"), "Calorie Range"], className="fw-bold mb-2"),
+                    html.Small("Filter items by calorie content", className="text-muted d-block mb-2"),
+                    dcc.RangeSlider(
+                        id='calorie-slider',
+                        min=0,
+                        max=int(stats['max_calories']),
+                        step=50,
+                        value=[0, int(stats['max_calories'])],
+                        marks={
+                            0: '0',
+                            500: '500',
+                            1000: '1k',
+                            1500: '1.5k',
+                            2000: '2k+',
+                        },
+                        tooltip={"placement": "bottom", "always_visible": True}
+                    ),
+                ], md=4),
+                dbc.Col([
+                    html.Label([html.I(className="fas fa-chart-line me-1"), "Nutrient Focus"], className="fw-bold mb-2"),
+                    html.Small("Choose which nutrient to analyze", className="text-muted d-block mb-2"),
+                    dcc.Dropdown(
+                        id='nutrient-selector',
+                        options=NUTRIENT_OPTIONS,
+                        value=DEFAULT_NUTRIENT,
+                        placeholder="Select a nutrient..."
+                    ),
+                ], md=4),
+            ], className="mb-3"),
+            html.Hr(),
+            dbc.Row([
+                dbc.Col([
+                    html.Small("💡 Tip: All charts update automatically when you change filters. Click the download icon on any chart to save it as PNG, or Download All for every chart in one ZIP.", 
+                              className="text-muted")
+                ], md=8),
+                dbc.Col([
+                    dbc.Button([html.I(className="fas fa-sync me-2"), "Reset"], 
+                              id='reset-btn', color="secondary", outline=True, size="sm", className="me-2"),
+                    dbc.DropdownMenu([
+                        dbc.DropdownMenuItem(label, id=element_id, external_link=True)
+                        for element_id, label, _ in CHART_BUNDLE_LINKS
+                    ], label=html.Span([html.I(className="fas fa-file-archive me-2"), "Download All"]),
+                       color="primary", size="sm", className="d-inline-block me-2"),
+                    make_export_menu(),
+                ], md=4, className="text-end"),
+            ]),
         ])
-    ], className="text-center shadow-sm"), md=3),
-], className="mb-4")
-
-controls_panel = dbc.Card([
-    dbc.CardHeader(html.H5([html.I(className="fas fa-sliders-h me-2"), "Customize Your View"])),
-    dbc.CardBody([
-        dbc.Row([
-            dbc.Col([
-                html.Label([html.I(className="fas fa-store me-1"), "Restaurant"], className="fw-bold mb-2"),
-                html.Small("Filter by specific restaurant or view all", className="text-muted d-block mb-2"),
-                dcc.Dropdown(
-                    id='restaurant-filter',
-                    options=[{'label': 'All Restaurants', 'value': 'ALL'}] + 
-                            [{'label': r, 'value': r} for r in data_service.get_restaurants()],
-                    value='ALL',
-                    multi=False,
-                    placeholder="Choose a restaurant..."
-                ),
-            ], md=4),
-            dbc.Col([
-                html.Label([html.I(className="fas fa-fire me-1"), "Calorie Range"], className="fw-bold mb-2"),
-                html.Small("Filter items by calorie content", className="text-muted d-block mb-2"),
-                dcc.RangeSlider(
-                    id='calorie-slider',
-                    min=0,
-                    max=int(stats['max_calories']),
-                    step=50,
-                    value=[0, int(stats['max_calories'])],
-                    marks={
-                        0: '0',
-                        500: '500',
-                        1000: '1k',
-                        1500: '1.5k',
-                        2000: '2k+',
-                    },
-                    tooltip={"placement": "bottom", "always_visible": True}
-                ),
-            ], md=4),
-            dbc.Col([
-                html.Label([html.I(className="fas fa-chart-line me-1"), "Nutrient Focus"], className="fw-bold mb-2"),
-                html.Small("Choose which nutrient to analyze", className="text-muted d-block mb-2"),
-                dcc.Dropdown(
-                    id='nutrient-selector',
-                    options=[
-                        {'label': '💪 Protein', 'value': 'protein'},
-                        {'label': '🧂 Sodium', 'value': 'sodium'},
-                        {'label': '🥓 Saturated Fat', 'value': 'saturated_fat'},
-                        {'label': '🍬 Sugars', 'value': 'sugars'},
-                        {'label': '🌾 Fiber', 'value': 'fiber'},
-                    ],
-                    value='protein',
-                    placeholder="Select a nutrient..."
-                ),
-            ], md=4),
-        ], className="mb-3"),
-        html.Hr(),
-        dbc.Row([
-            dbc.Col([
-                html.Small("💡 Tip: All charts update automatically when you change filters. Click the download icon on any chart to save it as PNG.", 
-                          className="text-muted")
-            ], md=8),
-            dbc.Col([
-                dbc.Button([html.I(className="fas fa-sync me-2"), "Reset"], 
-                          id='reset-btn', color="secondary", outline=True, size="sm", className="me-2"),
-                dbc.Button([html.I(className="fas fa-file-csv me-2"), "Export CSV"], 
-                          id='export-btn', color="primary", size="sm"),
-            ], md=4, className="text-end"),
-        ]),
-    ])
-], className="mb-4 shadow-sm")
+    ], className="mb-4 shadow-sm")
 
 tabs = dbc.Tabs([
     dbc.Tab(label="📊 Overview", tab_id="tab-overview", label_style={"cursor": "pointer"}),
@@ -148,64 +274,195 @@ tabs = dbc.Tabs([
     dbc.Tab(label="🧪 Advanced Analysis", tab_id="tab-explorer", label_style={"cursor": "pointer"}),
 ], id="tabs", active_tab="tab-overview", className="mb-3")
 
-app.layout = dbc.Container([
-    navbar,
-    welcome_alert,
-    stats_cards,
-    controls_panel,
-    tabs,
-    html.Div(id='tab-content'),
-    dcc.Download(id="download-data"),
-    dcc.Download(id="download-png"),
-], fluid=True, style={'backgroundColor': colors['background'], 'minHeight': '100vh', 'paddingBottom': '2rem'})
+def serve_layout():
+    """Built per page load, so the data is only needed once someone opens the dashboard."""
+    from src.services import data_service
+    stats = data_service.get_stats()
+    return dbc.Container([
+        navbar,
+        welcome_alert,
+        make_stats_cards(stats),
+        make_controls_panel(stats, data_service.get_restaurants()),
+        tabs,
+        html.Div(id='tab-content'),
+        dcc.Download(id="download-png"),
+    ], fluid=True, style={'backgroundColor': colors['background'], 'minHeight': '100vh', 'paddingBottom': '2rem'})
+
+
+app.layout = serve_layout
+
+
+def version_store_id(active_tab):
+    """Store in a tab's content holding the dataset version its figures were built from."""
+    return f"{active_tab}-version"
 
 
 @callback(
     Output('tab-content', 'children'),
-    [Input('tabs', 'active_tab'),
-     Input('restaurant-filter', 'value'),
-     Input('calorie-slider', 'value'),
-     Input('nutrient-selector', 'value')]
+    Input('tabs', 'active_tab'),
+    [State('restaurant-filter', 'value'),
+     State('calorie-slider', 'value'),
+     State('nutrient-selector', 'value')]
 )
 def render_tab_content(active_tab, restaurant, calorie_range, nutrient):
-    df = data_service.df.copy()
-    
-    if restaurant != 'ALL':
-        df = df[df['restaurant'] == restaurant]
+    """
+    Builds a tab's cards and graphs; filter changes afterwards only update the figures.
+    The tab's version store goes with its graphs, so it exists exactly while they do.
+    """
+    from src.services import data_service
+    renderers = {
+        "tab-overview": render_overview,
+        "tab-comparison": render_comparison,
+        "tab-items": render_items,
+        "tab-explorer": render_explorer,
+    }
+    if active_tab not in renderers:
+        return html.Div("Select a tab")
+    # Read before building: if a reload lands meanwhile, the next change rebuilds in full
+    version = data_service.dataset.version
+    return html.Div([
+        renderers[active_tab](*tab_figures(active_tab, restaurant, calorie_range, nutrient)),
+        dcc.Store(id=version_store_id(active_tab), data=version),
+    ])
+
+
+def update_tab_figures(active_tab, restaurant, calorie_range, nutrient, shown_version):
+    """
+    New figures for a tab's graphs after a filter change, and the dataset
+    version they come from.
+    When only the nutrient changed, figures it does not affect are left alone
+    and 'patch' figures are sent as a dash.Patch of their y/z arrays and titles.
+    Both rely on the shown figures coming from the current dataset version;
+    after a reload (shown_version differs) every figure is sent in full.
+    """
+    from src.services import data_service
+    _, _, nutrient_modes = FIGURE_BUILDERS[active_tab]
+    version = data_service.dataset.version
+    nutrient_only = (set(ctx.triggered_prop_ids.values()) == {'nutrient-selector'}
+                     and shown_version == version)
+    if nutrient_only and not any(nutrient_modes):
+        return [dash.no_update] * len(nutrient_modes), dash.no_update
     
-    df = df[(df['calories'] >= calorie_range[0]) & (df['calories'] <= calorie_range[1])]
+    figures = tab_figures(active_tab, restaurant, calorie_range, nutrient)
+    if not nutrient_only:
+        return figures, version
+    return [
+        dash.no_update if mode is None else nutrient_patch(fig) if mode == 'patch' else fig
+        for fig, mode in zip(figures, nutrient_modes)
+    ], dash.no_update
+
+
+def nutrient_patch(figure):
+    """
+    Patch turning the same figure for another nutrient into this one.
+    Valid when only the nutrient differs, so the traces line up one to one.
+    """
+    patch = dash.Patch()
+    for i, trace in enumerate(figure['data']):
+        for key in ('y', 'z', 'hovertemplate'):
+            if key in trace:
+                patch['data'][i][key] = trace[key]
+    layout = figure['layout']
+    patch['layout']['title'] = layout.get('title')
+    patch['layout']['yaxis']['title'] = layout.get('yaxis', {}).get('title')
+    return patch
+
+
+def tab_figures(active_tab, restaurant, calorie_range, nutrient):
+    """
+    Figure dicts for a tab, served from figure_cache when the same filters were
+    rendered before on the current dataset version.
+    Tabs that ignore the nutrient share one entry across all nutrients.
+    """
+    from src.figure_payload import loads, serialize_figure
+    from src.services import data_service
+    build, graph_ids, nutrient_modes = FIGURE_BUILDERS[active_tab]
+    calorie_range = tuple(calorie_range)
+    key = (active_tab, restaurant, calorie_range, nutrient if any(nutrient_modes) else None, data_service.version)
     
-    if active_tab == "tab-overview":
-        return render_overview(df, nutrient)
-    elif active_tab == "tab-comparison":
-        return render_comparison(df)
-    elif active_tab == "tab-items":
-        return render_items(df, nutrient)
-    elif active_tab == "tab-explorer":
-        return render_explorer(df)
+    def compute():
+        payloads = []
+        for graph_id, fig in zip(graph_ids, build(restaurant, calorie_range, nutrient)):
+            payload, full_size = serialize_figure(fig)
+            payload_sizes[(active_tab, graph_id)] = (full_size, len(payload))
+            if PAYLOAD_REPORT:
+                print(f"{active_tab} {graph_id}: {full_size:,} -> {len(payload):,} bytes", flush=True)
+            payloads.append(payload)
+        return b'[' + b','.join(payloads) + b']'
     
-    return html.Div("Select a tab")
+    return loads(figure_cache.get_or_compute(key, compute))
 
 
-def render_overview(df, nutrient):
-    fig_scatter = px.scatter(
-        df, 
-        x='calories', 
-        y=nutrient,
-        color='restaurant',
-        size='protein',
-        hover_data=['item'],
-        title=f'Calories vs {nutrient.replace("_", " ").title()}',
-        template='plotly_white',
-        height=500
-    )
+def filtered_frame(restaurant, calorie_range):
+    from src.services import data_service
+    return data_service.select(None if restaurant == 'ALL' else restaurant, tuple(calorie_range))
+
+
+def prewarm_figures():
+    """Renders every tab for the default filters into figure_cache."""
+    from src.services import data_service
+    default_range = [0, int(data_service.get_stats()['max_calories'])]
+    for tab in FIGURE_BUILDERS:
+        tab_figures(tab, 'ALL', default_range, DEFAULT_NUTRIENT)
+
+
+def add_point_count_label(fig, text):
+    """Notes above the plot area how many points a large-data figure shows."""
+    fig.add_annotation(text=text, xref='paper', yref='paper', x=1, y=1.06,
+                       xanchor='right', yanchor='bottom', showarrow=False,
+                       font=dict(size=11, color='gray'))
+
+
+def overview_figures(restaurant, calorie_range, nutrient):
+    import pandas as pd
+    import plotly.express as px
+    from src.downsample import density_grid
+    from src.services import data_service
+    
+    df = filtered_frame(restaurant, calorie_range)
+    title = f'Calories vs {nutrient.replace("_", " ").title()}'
+    n_points = len(df)
+    if n_points > DENSITY_POINTS:
+        x, y, counts = density_grid(df['calories'].to_numpy(), df[nutrient].to_numpy())
+        fig_scatter = go.Figure(go.Heatmap(
+            x=x, y=y, z=counts,
+            colorscale='Blues',
+            colorbar=dict(title='items'),
+            hovertemplate=f'calories=%{{x:.0f}}<br>{nutrient}=%{{y:.3g}}<br>items=%{{z}}<extra></extra>'
+        ))
+        fig_scatter.update_layout(title=title, xaxis_title='calories', yaxis_title=nutrient,
+                                  template='plotly_white', height=500)
+        label = f"{n_points:,} points aggregated into a density grid"
+    else:
+        large = n_points > LARGE_DATA_POINTS
+        fig_scatter = px.scatter(
+            df, 
+            x='calories', 
+            y=nutrient,
+            color='restaurant',
+            size='protein',
+            hover_data=['item'],
+            title=title,
+            template='plotly_white',
+            height=500,
+            render_mode='webgl' if large else 'auto'
+        )
+        label = f"{n_points:,} points shown (WebGL)" if large else None
     fig_scatter.update_layout(
         plot_bgcolor='white',
         paper_bgcolor='white',
         font=dict(size=12)
     )
+    if label:
+        add_point_count_label(fig_scatter, label)
     
-    rest_scores = pd.DataFrame(data_service.get_restaurant_scores())
+    rest_scores = pd.DataFrame(
+        data_service.get_restaurant_scores(
+            restaurant=None if restaurant == 'ALL' else restaurant,
+            calorie_range=tuple(calorie_range),
+        ),
+        columns=['restaurant', 'score', 'item_count', 'coefficients']
+    )
     fig_scores = px.bar(
         rest_scores,
         x='restaurant',
@@ -217,6 +474,10 @@ def render_overview(df, nutrient):
         color_continuous_scale='RdYlGn'
     )
     
+    return [fig_scatter, fig_scores]
+
+
+def render_overview(fig_scatter, fig_scores):
     return dbc.Container([
         dbc.Row([
             dbc.Col([
@@ -251,15 +512,13 @@ def render_overview(df, nutrient):
     ], fluid=True)
 
 
-def render_comparison(df):
-    rest_stats = df.groupby('restaurant').agg({
-        'calories': 'mean',
-        'sodium': 'mean',
-        'saturated_fat': 'mean',
-        'protein': 'mean',
-        'fiber': 'mean',
-        'sugars': 'mean'
-    }).reset_index()
+def comparison_figures(restaurant, calorie_range, nutrient):
+    import plotly.express as px
+    from src.services import data_service
+    
+    rest_stats = data_service.get_restaurant_means(
+        None if restaurant == 'ALL' else restaurant, tuple(calorie_range)
+    )
     
     fig_radar = go.Figure()
     
@@ -285,16 +544,38 @@ def render_comparison(df):
         template='plotly_white'
     )
     
-    fig_box = px.box(
-        df,
-        x='restaurant',
-        y='calories',
-        color='restaurant',
+    # Quartiles, whiskers and a capped set of outliers come precomputed from
+    # the server, so the payload does not grow with the number of items
+    palette = px.colors.qualitative.Plotly
+    fig_box = go.Figure()
+    boxes = data_service.get_calorie_boxes(None if restaurant == 'ALL' else restaurant, tuple(calorie_range))
+    for i, box in enumerate(boxes):
+        name, color = box['restaurant'], palette[i % len(palette)]
+        fig_box.add_trace(go.Box(
+            x=[name], q1=[box['q1']], median=[box['median']], q3=[box['q3']],
+            lowerfence=[box['lowerfence']], upperfence=[box['upperfence']],
+            name=name, legendgroup=name, marker_color=color, boxpoints=False
+        ))
+        if len(box['outliers']):
+            fig_box.add_trace(go.Scatter(
+                x=[name] * len(box['outliers']), y=box['outliers'],
+                mode='markers', name=name, legendgroup=name, showlegend=False,
+                marker_color=color, hovertemplate='restaurant=%{x}<br>calories=%{y}<extra></extra>'
+            ))
+    fig_box.update_layout(
         title='Calorie Distribution by Restaurant',
         template='plotly_white',
-        height=400
+        height=400,
+        boxmode='overlay',
+        xaxis_title='restaurant',
+        yaxis_title='calories',
+        legend_title_text='restaurant'
     )
     
+    return [fig_radar, fig_box]
+
+
+def render_comparison(fig_radar, fig_box):
     return dbc.Container([
         dbc.Row([
             dbc.Col([
@@ -316,7 +597,7 @@ def render_comparison(df):
                 dbc.Card([
                     dbc.CardHeader("Calorie Distribution"),
                     dbc.CardBody([
-                        dcc.Graph(figure=fig_box)
+                        dcc.Graph(id='box-chart', figure=fig_box)
                     ])
                 ], className="shadow-sm")
             ], md=12),
@@ -324,8 +605,15 @@ def render_comparison(df):
     ], fluid=True)
 
 
-def render_items(df, nutrient):
-    df_sorted = df.nsmallest(20, nutrient) if nutrient in ['sodium', 'saturated_fat', 'sugars'] else df.nlargest(20, nutrient)
+def items_figures(restaurant, calorie_range, nutrient):
+    import plotly.express as px
+    from src.services import data_service
+    
+    df_sorted = data_service.get_top_items(
+        nutrient, k=20,
+        restaurant=None if restaurant == 'ALL' else restaurant,
+        calorie_range=tuple(calorie_range),
+    )
     
     fig_items = px.bar(
         df_sorted,
@@ -339,6 +627,10 @@ def render_items(df, nutrient):
     )
     fig_items.update_layout(yaxis={'categoryorder': 'total ascending'})
     
+    return [fig_items]
+
+
+def render_items(fig_items):
     return dbc.Container([
         dbc.Row([
             dbc.Col([
@@ -358,17 +650,34 @@ def render_items(df, nutrient):
     ], fluid=True)
 
 
-def render_explorer(df):
-    df_macro = df.copy()
-    df_macro['fat_cal'] = df_macro['saturated_fat'] * 9
-    df_macro['carb_cal'] = df_macro['sugars'] * 4
-    df_macro['prot_cal'] = df_macro['protein'] * 4
-    total = df_macro['fat_cal'] + df_macro['carb_cal'] + df_macro['prot_cal']
+def explorer_figures(restaurant, calorie_range, nutrient):
+    import plotly.express as px
+    from src.downsample import stratified_sample
+    from src.services import data_service
+    
+    df = filtered_frame(restaurant, calorie_range)
+    fat_cal = df['saturated_fat'] * 9
+    carb_cal = df['sugars'] * 4
+    prot_cal = df['protein'] * 4
+    total = fat_cal + carb_cal + prot_cal
     total = total.replace(0, 1)
     
-    df_macro['% Fat'] = df_macro['fat_cal'] / total
-    df_macro['% Carbs'] = df_macro['carb_cal'] / total
-    df_macro['% Protein'] = df_macro['prot_cal'] / total
+    # A new frame with just the plotted columns; the shared filtered frame is left as is
+    df_macro = df[['restaurant', 'item', 'calories']].assign(**{
+        '% Fat': fat_cal / total,
+        '% Carbs': carb_cal / total,
+        '% Protein': prot_cal / total,
+    })
+    
+    n_points = len(df_macro)
+    if n_points > LARGE_DATA_POINTS:
+        # Per-restaurant sample that keeps each restaurant's extreme points
+        rows = stratified_sample(
+            df_macro['restaurant'].cat.codes.to_numpy(),
+            LARGE_DATA_POINTS,
+            extremes=[df_macro[c].to_numpy() for c in ('% Fat', '% Carbs', '% Protein', 'calories')],
+        )
+        df_macro = df_macro.iloc[rows]
     
     fig_ternary = px.scatter_ternary(
         df_macro,
@@ -383,8 +692,13 @@ def render_explorer(df):
         template='plotly_white',
         height=700
     )
+    if n_points > LARGE_DATA_POINTS:
+        add_point_count_label(
+            fig_ternary,
+            f"Showing {len(df_macro):,} of {n_points:,} points ({n_points - len(df_macro):,} sampled out)"
+        )
     
-    correlation = df[['calories', 'sodium', 'saturated_fat', 'protein', 'fiber', 'sugars']].corr()
+    correlation = data_service.get_correlation(None if restaurant == 'ALL' else restaurant, tuple(calorie_range))
     fig_heatmap = px.imshow(
         correlation,
         text_auto='.2f',
@@ -395,6 +709,10 @@ def render_explorer(df):
         height=500
     )
     
+    return [fig_ternary, fig_heatmap]
+
+
+def render_explorer(fig_ternary, fig_heatmap):
     return dbc.Container([
         dbc.Row([
             dbc.Col([
@@ -416,7 +734,7 @@ def render_explorer(df):
                 dbc.Card([
                     dbc.CardHeader("Correlation Heatmap"),
                     dbc.CardBody([
-                        dcc.Graph(figure=fig_heatmap)
+                        dcc.Graph(id='heatmap-chart', figure=fig_heatmap)
                     ])
                 ], className="shadow-sm")
             ], md=12),
@@ -424,6 +742,36 @@ def render_explorer(df):
     ], fluid=True)
 
 
+# tab -> (figure builder, graph ids, what a nutrient-only change does to each figure:
+#         None = unaffected, 'patch' = same traces with new values, 'replace' = rebuilt)
+FIGURE_BUILDERS = {
+    "tab-overview": (overview_figures, ['scatter-plot', 'bar-chart'], ['patch', None]),
+    "tab-comparison": (comparison_figures, ['radar-chart', 'box-chart'], [None, None]),
+    "tab-items": (items_figures, ['items-chart'], ['replace']),
+    "tab-explorer": (explorer_figures, ['ternary-chart', 'heatmap-chart'], [None, None]),
+}
+
+
+def register_figure_callback(active_tab, graph_ids):
+    # Graphs and the version store only exist while their tab is shown, so only that tab's callback runs
+    @callback(
+        [Output(graph_id, 'figure') for graph_id in graph_ids]
+        + [Output(version_store_id(active_tab), 'data')],
+        [Input('restaurant-filter', 'value'),
+         Input('calorie-slider', 'value'),
+         Input('nutrient-selector', 'value')],
+        State(version_store_id(active_tab), 'data'),
+        prevent_initial_call=True
+    )
+    def update_figures(restaurant, calorie_range, nutrient, shown_version):
+        figures, version = update_tab_figures(active_tab, restaurant, calorie_range, nutrient, shown_version)
+        return [*figures, version]
+
+
+for _tab, (_, _graph_ids, _) in FIGURE_BUILDERS.items():
+    register_figure_callback(_tab, _graph_ids)
+
+
 @callback(
     [Output('restaurant-filter', 'value'),
      Output('calorie-slider', 'value'),
@@ -432,22 +780,52 @@ def render_explorer(df):
     prevent_initial_call=True
 )
 def reset_filters(n_clicks):
-    return 'ALL', [0, int(stats['max_calories'])], 'protein'
+    from src.services import data_service
+    return 'ALL', [0, int(data_service.get_stats()['max_calories'])], DEFAULT_NUTRIENT
 
 
 @callback(
-    Output("download-data", "data"),
-    Input("export-btn", "n_clicks"),
-    [State('restaurant-filter', 'value'),
-     State('calorie-slider', 'value')],
-    prevent_initial_call=True
+    [Output(element_id, 'href') for element_id, _, _, _ in DATA_EXPORT_LINKS]
+    + [Output(element_id, 'href') for element_id, _, _ in CHART_BUNDLE_LINKS],
+    [Input('restaurant-filter', 'value'),
+     Input('calorie-slider', 'value'),
+     Input('nutrient-selector', 'value')]
 )
-def export_data(n_clicks, restaurant, calorie_range):
-    df = data_service.df.copy()
-    if restaurant != 'ALL':
-        df = df[df['restaurant'] == restaurant]
-    df = df[(df['calories'] >= calorie_range[0]) & (df['calories'] <= calorie_range[1])]
-    return dcc.send_data_frame(df.to_csv, "nutrition_data.csv", index=False)
+def update_export_links(restaurant, calorie_range, nutrient):
+    from urllib.parse import urlencode
+    query = {'restaurant': restaurant, 'min_calories': calorie_range[0], 'max_calories': calorie_range[1]}
+    return [
+        app.get_relative_path('/export/data') + '?' + urlencode({**query, 'format': fmt, **({'scores': 1} if scores else {})})
+        for _, _, fmt, scores in DATA_EXPORT_LINKS
+    ] + [
+        app.get_relative_path('/export/charts') + '?' + urlencode({**query, 'nutrient': nutrient, 'format': fmt})
+        for _, _, fmt in CHART_BUNDLE_LINKS
+    ]
+
+
+@server.route('/export/data')
+def export_data():
+    """
+    Streams the filtered rows as they are encoded, so the download starts at
+    once and memory use does not grow with the selection.
+    Query: restaurant (default ALL), min_calories, max_calories,
+    format (csv, parquet or arrow) and scores=1 for rawScore/penalizedScore.
+    """
+    from flask import Response, abort, request
+    from src.data_exports import EXPORT_FORMATS, available_formats, stream_export
+    from src.services import data_service
+    
+    fmt = request.args.get('format', 'csv')
+    if fmt not in available_formats():
+        abort(400, f"format must be one of {', '.join(available_formats())}")
+    restaurant = request.args.get('restaurant', 'ALL')
+    calorie_range = (request.args.get('min_calories', float('-inf'), type=float),
+                     request.args.get('max_calories', float('inf'), type=float))
+    chunks = data_service.iter_selection(None if restaurant == 'ALL' else restaurant, calorie_range,
+                                         scores=request.args.get('scores') == '1')
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    return Response(stream_export(chunks, fmt), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename=nutrition_data.{extension}'})
 
 
 @callback(
@@ -466,26 +844,101 @@ def export_data(n_clicks, restaurant, calorie_range):
 )
 def export_graph_png(scatter_clicks, bar_clicks, radar_clicks, items_clicks, ternary_clicks,
                      scatter_fig, bar_fig, radar_fig, items_fig, ternary_fig):
-    if not ctx.triggered_id:
+    from src.graph_exports import GRAPH_EXPORTS, GRAPH_FILES, RenderQueueFull, graph_renderer
+    
+    if ctx.triggered_id not in GRAPH_EXPORTS:
         return None
     
-    figure_map = {
-        'download-scatter-btn': (scatter_fig, 'nutrition_scatter.png'),
-        'download-bar-btn': (bar_fig, 'restaurant_rankings.png'),
-        'download-radar-btn': (radar_fig, 'nutrition_radar.png'),
-        'download-items-btn': (items_fig, 'item_rankings.png'),
-        'download-ternary-btn': (ternary_fig, 'macronutrient_ternary.png')
+    graph_id = GRAPH_EXPORTS[ctx.triggered_id]
+    figures = {
+        'scatter-plot': scatter_fig,
+        'bar-chart': bar_fig,
+        'radar-chart': radar_fig,
+        'items-chart': items_fig,
+        'ternary-chart': ternary_fig,
     }
+    if not figures[graph_id]:
+        return None
+    try:
+        img_bytes = graph_renderer.render(figures[graph_id])
+    except RenderQueueFull:
+        raise dash.exceptions.PreventUpdate
+    return dcc.send_bytes(img_bytes, f"{GRAPH_FILES[graph_id]}.png")
+
+
+@server.route('/export/charts')
+def export_charts():
+    """
+    Every tab's figures for the given filters, rendered in parallel and
+    streamed back as one ZIP, each image as soon as it is ready.
+    Query: restaurant (default ALL), min_calories, max_calories, nutrient
+    and format (png or svg). Answers 503 when the export queue is full.
+    """
+    from flask import Response, abort, request
+    from src.graph_exports import RenderQueueFull, stream_bundle
+    from src.services import data_service
     
-    if ctx.triggered_id in figure_map:
-        fig_data, filename = figure_map[ctx.triggered_id]
-        if fig_data:
-            fig = go.Figure(fig_data)
-            img_bytes = pio.to_image(fig, format='png', width=1200, height=800, engine='kaleido')
-            return dcc.send_bytes(img_bytes, filename)
+    fmt = request.args.get('format', 'png')
+    if fmt not in ('png', 'svg'):
+        abort(400, "format must be png or svg")
+    nutrient = request.args.get('nutrient', DEFAULT_NUTRIENT)
+    if nutrient not in {option['value'] for option in NUTRIENT_OPTIONS}:
+        abort(400, f"unknown nutrient {nutrient!r}")
+    restaurant = request.args.get('restaurant', 'ALL')
+    calorie_range = (request.args.get('min_calories', 0, type=float),
+                     request.args.get('max_calories', float(data_service.get_stats()['max_calories']), type=float))
     
-    return None
+    figures = {}
+    for tab, (_, graph_ids, _) in FIGURE_BUILDERS.items():
+        figures.update(zip(graph_ids, tab_figures(tab, restaurant, calorie_range, nutrient)))
+    manifest = {
+        'restaurant': restaurant,
+        'calorie_range': list(calorie_range),
+        'nutrient': nutrient,
+        'dataset_version': data_service.version,
+    }
+    try:
+        chunks = stream_bundle(figures, fmt, manifest)
+    except RenderQueueFull:
+        abort(503, "the image export queue is full, try again shortly")
+    return Response(chunks, mimetype='application/zip',
+                    headers={'Content-Disposition': f'attachment; filename=nutrition_charts_{fmt}.zip'})
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Fast Food Nutrition Dashboard")
+    parser.add_argument('--startup-profile', action='store_true',
+                        help="print the time spent in each import and init phase")
+    parser.add_argument('--lazy', action='store_true',
+                        help="skip the background prewarm and load data on the first request")
+    parser.add_argument('--prewarm-figures', action='store_true',
+                        help="also render every tab for the default filters during prewarm")
+    parser.add_argument('--prewarm-exports', action='store_true',
+                        help="start the image export worker processes during prewarm")
+    parser.add_argument('--export-workers', type=int, default=None,
+                        help="number of image export worker processes (default: one per CPU, up to 7)")
+    parser.add_argument('--no-reload', action='store_true',
+                        help="do not watch data/fastfood.csv and reload it when it changes")
+    parser.add_argument('--large-data-points', type=int, default=LARGE_DATA_POINTS,
+                        help="item count above which scatter uses WebGL and the ternary plot is sampled")
+    parser.add_argument('--density-points', type=int, default=DENSITY_POINTS,
+                        help="item count above which the scatter becomes a density grid")
+    parser.add_argument('--payload-report', action='store_true',
+                        help="print each figure's JSON size before and after compaction")
+    args = parser.parse_args()
+    LARGE_DATA_POINTS, DENSITY_POINTS = args.large_data_points, args.density_points
+    PAYLOAD_REPORT = args.payload_report
+    if args.export_workers:
+        import src.graph_exports
+        src.graph_exports.graph_renderer = src.graph_exports.GraphRenderer(workers=args.export_workers)
+    
+    if args.lazy:
+        from src.services import data_service
+        data_service.on_first_load(data_ready.set)
+        if args.startup_profile:
+            print(startup_profile.report(), flush=True)
+    else:
+        start_prewarm(report=args.startup_profile, figures=args.prewarm_figures, exports=args.prewarm_exports)
+    if not args.no_reload:
+        start_data_watch()
     app.run(host='0.0.0.0', port=5000, debug=False)
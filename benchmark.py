@@ -0,0 +1,248 @@
+"""
+Micro-benchmarks for the data pipeline and figure rendering on synthetic
+datasets (see src/synthetic.py).
+
+    python benchmark.py --rows 1000 100000 --restaurants 8 500 --output results.json
+    python benchmark.py --compare results.json --threshold 0.2
+
+Each stage is timed over --repeat runs (best and mean are reported), then run
+once more under tracemalloc for its peak Python/NumPy allocation. Memory-mapped
+snapshot pages are not allocations and do not show up in peak_bytes.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.synthetic import generate_fast_food_csv
+
+BENCHMARK_DIR = Path(__file__).parent / "data" / ".benchmarks"
+# Above this many rows the list-of-records pipeline takes minutes and GBs, so it is skipped
+LEGACY_MAX_ROWS = 1_000_000
+
+
+def measure(run: Callable[[object], object], setup: Optional[Callable[[], object]] = None,
+            repeat: int = 3, memory: bool = True) -> Dict:
+    """
+    Timing and peak allocation of run(setup()); setup is not measured.
+    - seconds: best, mean and every run
+    - peak_bytes: from a separate tracemalloc run, so tracing does not slow the timed runs
+    """
+    runs = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        gc.collect()
+        start = time.perf_counter()
+        run(arg)
+        runs.append(time.perf_counter() - start)
+        del arg
+    result = {'seconds': {'best': min(runs), 'mean': sum(runs) / len(runs), 'runs': runs}}
+    if memory:
+        arg = setup() if setup else None
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run(arg)
+            result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def dataset_path(rows: int, restaurants: int, seed: int) -> Path:
+    """Generated CSV for a case, reused across runs since generation is deterministic."""
+    path = BENCHMARK_DIR / f"fastfood_{rows}x{restaurants}_s{seed}.csv"
+    if not path.exists():
+        partial = path.with_suffix('.tmp')
+        generate_fast_food_csv(partial, rows, restaurants, seed)
+        os.replace(partial, path)
+    return path
+
+
+def largest_restaurant(columns) -> tuple:
+    """(calories, protein) lists of the restaurant with the most items, as fit_quartic takes them."""
+    code = int(np.bincount(columns.restaurant_codes).argmax())
+    rows = columns.restaurant_codes == code
+    return columns.values['calories'][rows].tolist(), columns.values['protein'][rows].tolist()
+
+
+def run_case(rows: int, restaurants: int, seed: int, repeat: int, memory: bool,
+             legacy_max_rows: int, figures: bool) -> Dict[str, Dict]:
+    """Results for every stage on one synthetic dataset, keyed by stage name."""
+    from src import services
+    from src.analyzer import analyze_fast_food_data, fit_quartic, parse_fast_food_csv
+    from src.columnar import analyze_columns, read_fast_food_columns
+
+    csv_path = dataset_path(rows, restaurants, seed)
+    results: Dict[str, Dict] = {}
+
+    def stage(name: str, run, setup=None):
+        print(f"  {name}", end='', flush=True)
+        results[name] = measure(run, setup, repeat, memory)
+        print(f"  {results[name]['seconds']['best'] * 1000:.1f} ms", flush=True)
+
+    def skip(name: str, reason: str):
+        print(f"  {name}  skipped ({reason})", flush=True)
+        results[name] = {'skipped': reason}
+
+    if rows <= legacy_max_rows:
+        stage('parse_fast_food_csv', lambda text: parse_fast_food_csv(text), csv_path.read_text)
+        records = parse_fast_food_csv(csv_path.read_text())
+        stage('analyze_fast_food_data', lambda _: analyze_fast_food_data(records))
+        del records
+    else:
+        for name in ('parse_fast_food_csv', 'analyze_fast_food_data'):
+            skip(name, f"more than {legacy_max_rows:,} rows")
+
+    stage('read_fast_food_columns', lambda _: read_fast_food_columns(csv_path))
+    columns = read_fast_food_columns(csv_path).sorted_by_restaurant()
+    stage('analyze_columns', lambda _: analyze_columns(columns))
+    xs, ys = largest_restaurant(columns)
+    stage('fit_quartic', lambda _: fit_quartic(xs, ys))
+    del columns
+
+    # Point the data service at this dataset, with snapshots in a scratch directory
+    service = services.data_service
+    saved = services.CSV_PATH, services.SNAPSHOT_DIR
+    scratch = Path(tempfile.mkdtemp(prefix='benchmark-'))
+    services.CSV_PATH, services.SNAPSHOT_DIR = csv_path, scratch / 'snapshots'
+
+    def unload(cold: bool):
+        service._dataset = None
+        if cold:
+            shutil.rmtree(services.SNAPSHOT_DIR, ignore_errors=True)
+
+    try:
+        stage('DataService._load_data (cold)', lambda _: service._load_data(), lambda: unload(True))
+        stage('DataService._load_data (snapshot)', lambda _: service._load_data(), lambda: unload(False))
+        service._load_data()
+        dataset = service.dataset
+        stage('Dataset.warm', lambda fresh: fresh.warm(),
+              lambda: services.Dataset(dataset.columns, dataset.analysis, dataset.version))
+        dataset.warm()
+        if figures:
+            run_figure_stages(service, stage)
+    finally:
+        services.CSV_PATH, services.SNAPSHOT_DIR = saved
+        service._dataset = None
+        shutil.rmtree(scratch, ignore_errors=True)
+    return results
+
+
+def run_figure_stages(service, stage) -> None:
+    """Each tab's figure builder, its render_* layout function and figure serialization."""
+    import app
+    from src.figure_payload import loads, serialize_figure
+
+    renderers = {
+        'tab-overview': app.render_overview,
+        'tab-comparison': app.render_comparison,
+        'tab-items': app.render_items,
+        'tab-explorer': app.render_explorer,
+    }
+    calorie_range = (0, int(service.get_stats()['max_calories']))
+    for tab, (build, _, _) in app.FIGURE_BUILDERS.items():
+        args = ('ALL', calorie_range, app.DEFAULT_NUTRIENT)
+        # The filter cache is cleared first, so each build filters the data as a first request would
+        stage(f"{build.__name__}", lambda _: build(*args), service.filter_cache.clear)
+        built = build(*args)
+        stage(f"serialize_figure ({tab})", lambda _: [serialize_figure(fig) for fig in built])
+        payloads = [loads(serialize_figure(fig)[0]) for fig in built]
+        render = renderers[tab]
+        stage(f"{render.__name__}", lambda _: render(*payloads))
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict:
+    import pandas as pd
+    import plotly
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plotly': plotly.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'commit': git_commit(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Prints best-time ratios for stages present in both runs and returns those
+    more than `threshold` (e.g. 0.2 = 20%) slower than the baseline.
+    """
+    regressions = []
+    for case, stages in current['cases'].items():
+        before = baseline.get('cases', {}).get(case, {})
+        for name, result in stages.items():
+            old = before.get(name, {})
+            if 'seconds' not in result or 'seconds' not in old:
+                continue
+            ratio = result['seconds']['best'] / old['seconds']['best']
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = '  REGRESSION'
+                regressions.append(f"{case} {name}")
+            print(f"{case:<28} {name:<40} {old['seconds']['best'] * 1000:10.1f} ms -> "
+                  f"{result['seconds']['best'] * 1000:10.1f} ms  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the data pipeline on synthetic datasets")
+    parser.add_argument('--rows', type=lambda v: int(float(v)), nargs='+', default=[1_000, 100_000],
+                        help="dataset sizes in rows (1e6 notation accepted)")
+    parser.add_argument('--restaurants', type=int, nargs='+', default=[8],
+                        help="restaurant counts; every size is run with every count")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per stage")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc run of each stage")
+    parser.add_argument('--no-figures', action='store_true', help="skip the figure and render_* stages")
+    parser.add_argument('--legacy-max-rows', type=lambda v: int(float(v)), default=LEGACY_MAX_ROWS,
+                        help="largest size to run parse_fast_food_csv and analyze_fast_food_data on")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--compare', help="baseline results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="slowdown versus the baseline reported as a regression (default 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = {'environment': environment(), 'repeat': args.repeat, 'seed': args.seed, 'cases': {}}
+    for rows in args.rows:
+        for restaurants in args.restaurants:
+            case = f"rows={rows},restaurants={restaurants}"
+            print(case, flush=True)
+            results['cases'][case] = run_case(rows, restaurants, args.seed, args.repeat, not args.no_memory,
+                                              args.legacy_max_rows, not args.no_figures)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    if args.compare:
+        regressions = compare(results, json.loads(Path(args.compare).read_text()), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} stage(s) slower than the baseline by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,5 @@
 import os
+import sys
 import csv
 import asyncio
 
@@ -6,4 +7,7 @@ from src.data_loader import load_data
 
 
 if __name__ == "__main__":
-    load_data()
+    fast_food = load_data(*sys.argv[1:2])
+    print(f"Loaded {len(fast_food):,} rows")
+    for stage, seconds in fast_food.attrs["timings"].items():
+        print(f"  {stage}: {seconds * 1000:.1f} ms")
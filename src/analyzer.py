@@ -1,17 +1,49 @@
 from __future__ import annotations
 
 import csv
+import itertools
 import math
 from dataclasses import dataclass
-from typing import List, Dict, Tuple, Optional
+from typing import Callable, Iterable, Iterator, List, Dict, Sequence, Tuple, Optional
+
+import numpy as np
 
 
 BadNutrientKey = str  # "sodium" | "saturated_fat" | "trans_fat" | "cholesterol" | "sugars"
 GoodNutrientKey = str  # "fiber" | "protein" | "vitamin_a" | "vitamin_c" | "calcium"
 NutrientKey = str      # union of both
 
-
-@dataclass
+BAD_KEYS: List[BadNutrientKey] = [
+    "sodium",
+    "saturated_fat",
+    "trans_fat",
+    "cholesterol",
+    "sugars",
+]
+GOOD_KEYS: List[GoodNutrientKey] = [
+    "fiber",
+    "protein",
+    "vitamin_a",
+    "vitamin_c",
+    "calcium",
+]
+NUTRIENT_KEYS: List[NutrientKey] = BAD_KEYS + GOOD_KEYS
+
+# FoodRecord fields, in declaration order
+RECORD_FIELDS: List[str] = ["restaurant", "item", "calories"] + NUTRIENT_KEYS
+
+# Bump whenever a change to the analysis would change its results,
+# so persisted results (see src/snapshot.py) are recomputed
+ANALYSIS_VERSION = 2
+
+BAD_TARGET_MIN = -100.0
+GOOD_TARGET_MAX = 100.0
+
+# Items above this many calories get a non-polynomial penalty (see penalty_factor)
+PENALTY_CALORIES = 2000.0
+
+
+@dataclass(slots=True)
 class FoodRecord:
     restaurant: str
     item: str
@@ -31,7 +63,7 @@ class FoodRecord:
 QuarticCoefficients = Tuple[float, float, float, float, float]  # a0..a4
 
 
-@dataclass
+@dataclass(slots=True)
 class ItemScore:
     item: FoodRecord
     rawScore: float
@@ -44,7 +76,7 @@ class RestaurantScoreResult:
     itemCount: int
     score: float
     finalCoeffs: QuarticCoefficients
-    items: List[ItemScore]
+    items: Sequence[ItemScore]
 
 
 @dataclass
@@ -59,6 +91,11 @@ def evaluate_quartic(coeffs: QuarticCoefficients, x: float) -> float:
     return a0 + a1 * x + a2 * x * x + a3 * x * x * x + a4 * x * x * x * x
 
 
+def evaluate_quartic_batched(coeffs: np.ndarray, x: np.ndarray) -> np.ndarray:
+    a0, a1, a2, a3, a4 = (coeffs[..., k] for k in range(5))
+    return a0 + a1 * x + a2 * x * x + a3 * x * x * x + a4 * x * x * x * x
+
+
 def solve_normal_equations_5(A: List[List[float]], b: List[float]) -> QuarticCoefficients:
     n = 5
     # Gaussian elimination with partial pivoting (in-place, like TS version)
@@ -123,15 +160,130 @@ def fit_quartic(xs: List[float], ys: List[float]) -> QuarticCoefficients:
     return solve_normal_equations_5(A, b)
 
 
-def shift_quartic_to_min(coeffs: QuarticCoefficients, xs: List[float], target_min: float) -> QuarticCoefficients:
+def _cubic_real_roots(d3: np.ndarray, d2: np.ndarray, d1: np.ndarray, d0: np.ndarray) -> np.ndarray:
+    """
+    Closed-form real roots of d3*t^3 + d2*t^2 + d1*t + d0, element-wise.
+    - Returns shape (..., 3); missing roots are NaN
+    - Falls back to the quadratic / linear formula when leading terms vanish
+    - Each root gets two Newton steps to polish rounding from the closed form
+    """
+    scale = np.maximum.reduce([np.abs(d3), np.abs(d2), np.abs(d1), np.abs(d0)])
+    eps = 1e-12 * scale
+    is_cubic = np.abs(d3) > eps
+    is_quadratic = ~is_cubic & (np.abs(d2) > eps)
+    is_linear = ~is_cubic & ~is_quadratic & (np.abs(d1) > eps)
+
+    roots = np.full(np.shape(d0) + (3,), np.nan)
+
+    with np.errstate(all="ignore"):
+        # Cubic: depressed form u^3 + p*u + q with t = u - b/3
+        b = d2 / d3
+        c = d1 / d3
+        d = d0 / d3
+        p = c - b * b / 3.0
+        q = 2.0 * b * b * b / 27.0 - b * c / 3.0 + d
+        disc = (q / 2.0) ** 2 + (p / 3.0) ** 3
+
+        sqrt_disc = np.sqrt(np.where(disc > 0, disc, 0.0))
+        one_root = np.cbrt(-q / 2.0 + sqrt_disc) + np.cbrt(-q / 2.0 - sqrt_disc)
+
+        neg_p = np.where(p < 0, -p, 1.0)
+        r = 2.0 * np.sqrt(neg_p / 3.0)
+        phi = np.arccos(np.clip((3.0 * q / (2.0 * -neg_p)) * np.sqrt(3.0 / neg_p), -1.0, 1.0)) / 3.0
+        three_roots = np.stack([r * np.cos(phi - 2.0 * np.pi * k / 3.0) for k in range(3)], axis=-1)
+        three_roots = np.where((p < 0)[..., None], three_roots, 0.0)
+
+        cubic_roots = np.where(
+            (disc > 0)[..., None],
+            np.stack([one_root, np.full_like(one_root, np.nan), np.full_like(one_root, np.nan)], axis=-1),
+            three_roots,
+        ) - (b / 3.0)[..., None]
+        roots = np.where(is_cubic[..., None], cubic_roots, roots)
+
+        # Quadratic: numerically stable form of the quadratic formula
+        qdisc = d1 * d1 - 4.0 * d2 * d0
+        sign = np.where(d1 >= 0, 1.0, -1.0)
+        half = -0.5 * (d1 + sign * np.sqrt(np.where(qdisc >= 0, qdisc, np.nan)))
+        quad_roots = np.stack([half / d2, np.where(half != 0, d0 / half, half / d2), np.full_like(half, np.nan)], axis=-1)
+        roots = np.where(is_quadratic[..., None], quad_roots, roots)
+
+        # Linear
+        lin_root = -d0 / d1
+        lin_roots = np.stack([lin_root, np.full_like(lin_root, np.nan), np.full_like(lin_root, np.nan)], axis=-1)
+        roots = np.where(is_linear[..., None], lin_roots, roots)
+
+        for _ in range(2):
+            t = roots
+            value = ((d3[..., None] * t + d2[..., None]) * t + d1[..., None]) * t + d0[..., None]
+            slope = (3.0 * d3[..., None] * t + 2.0 * d2[..., None]) * t + d1[..., None]
+            step = np.where(slope != 0, value / slope, 0.0)
+            roots = np.where(np.isfinite(step), t - step, t)
+
+    return roots
+
+
+def quartic_extrema_batched(coeffs: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Analytic min and max of each quartic over [lo, hi].
+    - coeffs has shape (..., 5); lo and hi broadcast against coeffs[..., 0]
+    - Solves the cubic derivative in closed form and evaluates the quartic only
+      at the critical points inside the interval plus the two endpoints
+    """
+    coeffs = np.asarray(coeffs, dtype=float)
+    lo = np.broadcast_to(np.asarray(lo, dtype=float), coeffs.shape[:-1])
+    hi = np.broadcast_to(np.asarray(hi, dtype=float), coeffs.shape[:-1])
+    _, a1, a2, a3, a4 = (coeffs[..., k] for k in range(5))
+
+    # Derivative 4*a4*x^3 + 3*a3*x^2 + 2*a2*x + a1, rewritten in t = (x - mid) / half
+    # so that the interval maps onto [-1, 1] and the roots are well scaled
+    c3, c2, c1, c0 = 4.0 * a4, 3.0 * a3, 2.0 * a2, a1
+    mid = (lo + hi) / 2.0
+    half = (hi - lo) / 2.0
+    d0 = ((c3 * mid + c2) * mid + c1) * mid + c0
+    d1 = ((3.0 * c3 * mid + 2.0 * c2) * mid + c1) * half
+    d2 = (3.0 * c3 * mid + c2) * half * half
+    d3 = c3 * half * half * half
+
+    t = _cubic_real_roots(d3, d2, d1, d0)
+    inside = np.isfinite(t) & (np.abs(t) <= 1.0)
+    xs = np.concatenate([
+        np.where(inside, mid[..., None] + half[..., None] * t, lo[..., None]),
+        lo[..., None],
+        hi[..., None],
+    ], axis=-1)
+
+    values = evaluate_quartic_batched(coeffs[..., None, :], xs)
+    return values.min(axis=-1), values.max(axis=-1)
+
+
+def quartic_extrema(coeffs: QuarticCoefficients, lo: float, hi: float) -> Tuple[float, float]:
+    min_y, max_y = quartic_extrema_batched(np.asarray(coeffs, dtype=float), lo, hi)
+    return float(min_y), float(max_y)
+
+
+def shift_quartic_to_min(
+    coeffs: QuarticCoefficients,
+    xs: List[float],
+    target_min: float,
+    sampled: bool = False,
+) -> QuarticCoefficients:
+    """
+    Shifts the quartic so its minimum over xs equals target_min.
+    - sampled=False: analytic minimum over [min(xs), max(xs)], so callers may
+      pass just the two interval endpoints
+    - sampled=True: minimum over the sample points themselves (original mode)
+    """
     if not xs:
         return coeffs
 
-    min_y = float("inf")
-    for x in xs:
-        y = evaluate_quartic(coeffs, x)
-        if y < min_y:
-            min_y = y
+    if sampled:
+        min_y = float("inf")
+        for x in xs:
+            y = evaluate_quartic(coeffs, x)
+            if y < min_y:
+                min_y = y
+    else:
+        min_y, _ = quartic_extrema(coeffs, min(xs), max(xs))
 
     if not math.isfinite(min_y):
         return coeffs
@@ -141,15 +293,24 @@ def shift_quartic_to_min(coeffs: QuarticCoefficients, xs: List[float], target_mi
     return (a0 + delta, a1, a2, a3, a4)
 
 
-def shift_quartic_to_max(coeffs: QuarticCoefficients, xs: List[float], target_max: float) -> QuarticCoefficients:
+def shift_quartic_to_max(
+    coeffs: QuarticCoefficients,
+    xs: List[float],
+    target_max: float,
+    sampled: bool = False,
+) -> QuarticCoefficients:
+    """Counterpart of shift_quartic_to_min for the maximum."""
     if not xs:
         return coeffs
 
-    max_y = -float("inf")
-    for x in xs:
-        y = evaluate_quartic(coeffs, x)
-        if y > max_y:
-            max_y = y
+    if sampled:
+        max_y = -float("inf")
+        for x in xs:
+            y = evaluate_quartic(coeffs, x)
+            if y > max_y:
+                max_y = y
+    else:
+        _, max_y = quartic_extrema(coeffs, min(xs), max(xs))
 
     if not math.isfinite(max_y):
         return coeffs
@@ -203,7 +364,7 @@ def safe_ratio(numerator: float, denominator: float) -> float:
     return numerator / denominator
 
 
-def analyze_fast_food_data(records: List[FoodRecord]) -> Optional[AnalysisResult]:
+def _analyze_scalar(records: List[FoodRecord], sampled_extrema: bool = False) -> Optional[AnalysisResult]:
     if not records:
         return None
 
@@ -222,27 +383,14 @@ def analyze_fast_food_data(records: List[FoodRecord]) -> Optional[AnalysisResult
 
     restaurants: List[RestaurantScoreResult] = []
 
-    bad_keys: List[BadNutrientKey] = [
-        "sodium",
-        "saturated_fat",
-        "trans_fat",
-        "cholesterol",
-        "sugars",
-    ]
-    good_keys: List[GoodNutrientKey] = [
-        "fiber",
-        "protein",
-        "vitamin_a",
-        "vitamin_c",
-        "calcium",
-    ]
-
     for restaurant, items in by_restaurant.items():
         xs_all = [i.calories for i in items if i.calories > 0]
+        # The analytic extrema only need the interval endpoints
+        xs_extrema = xs_all if sampled_extrema or not xs_all else [min(xs_all), max(xs_all)]
 
         # Combined bad quartic
         combined_bad: QuarticCoefficients = (0.0, 0.0, 0.0, 0.0, 0.0)
-        for key in bad_keys:
+        for key in BAD_KEYS:
             xs: List[float] = []
             ys: List[float] = []
             for item in items:
@@ -255,12 +403,12 @@ def analyze_fast_food_data(records: List[FoodRecord]) -> Optional[AnalysisResult
             if not xs:
                 continue
             coeffs = fit_quartic(xs, ys)
-            shifted = shift_quartic_to_min(coeffs, xs_all, -100.0)
+            shifted = shift_quartic_to_min(coeffs, xs_extrema, BAD_TARGET_MIN, sampled_extrema)
             combined_bad = add_quartic(combined_bad, shifted)
 
         # Combined good quartic
         combined_good: QuarticCoefficients = (0.0, 0.0, 0.0, 0.0, 0.0)
-        for key in good_keys:
+        for key in GOOD_KEYS:
             xs = []
             ys = []
             for item in items:
@@ -273,7 +421,7 @@ def analyze_fast_food_data(records: List[FoodRecord]) -> Optional[AnalysisResult
             if not xs:
                 continue
             coeffs = fit_quartic(xs, ys)
-            shifted = shift_quartic_to_max(coeffs, xs_all, 100.0)
+            shifted = shift_quartic_to_max(coeffs, xs_extrema, GOOD_TARGET_MAX, sampled_extrema)
             combined_good = add_quartic(combined_good, shifted)
 
         final_coeffs = add_quartic(combined_bad, combined_good)
@@ -307,8 +455,332 @@ def analyze_fast_food_data(records: List[FoodRecord]) -> Optional[AnalysisResult
     )
 
 
+def solve_normal_equations_5_batched(A: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Stacked counterpart of solve_normal_equations_5.
+    - A has shape (..., 5, 5) and b has shape (..., 5)
+    - Runs the same Gauss-Jordan elimination with partial pivoting on every
+      system at once, so results match the scalar solver step for step
+    - Near-singular systems fall back to zeros, like the scalar version
+    """
+    n = 5
+    batch_shape = b.shape[:-1]
+    A = np.array(A, dtype=float).reshape(-1, n, n)
+    b = np.array(b, dtype=float).reshape(-1, n)
+    rows = np.arange(len(b))
+    singular = np.zeros(len(b), dtype=bool)
+
+    with np.errstate(all="ignore"):
+        for i in range(n):
+            # Pivot (argmax keeps the first maximum, like the scalar loop)
+            max_row = i + np.argmax(np.abs(A[:, i:, i]), axis=1)
+            singular |= np.abs(A[rows, max_row, i]) < 1e-12
+
+            A_i = A[rows, i].copy()
+            A[rows, i] = A[rows, max_row]
+            A[rows, max_row] = A_i
+            b_i = b[rows, i].copy()
+            b[rows, i] = b[rows, max_row]
+            b[rows, max_row] = b_i
+
+            pivot = np.where(singular, 1.0, A[:, i, i])
+            A[:, i, i:] /= pivot[:, None]
+            b[:, i] /= pivot
+
+            for r in range(n):
+                if r == i:
+                    continue
+                factor = A[:, r, i].copy()
+                factor[np.abs(factor) < 1e-12] = 0.0
+                A[:, r, i:] -= factor[:, None] * A[:, i, i:]
+                b[:, r] -= factor * b[:, i]
+
+    b[singular] = 0.0
+    return b.reshape(batch_shape + (n,))
+
+
+def penalty_factor_batched(calories: np.ndarray, raw_scores: np.ndarray) -> np.ndarray:
+    """Vectorized penalty_factor over matching arrays of calories and raw scores."""
+    factor = np.ones_like(raw_scores, dtype=float)
+    over = calories > PENALTY_CALORIES
+    if not over.any():
+        return factor
+
+    log_diff = np.log(calories[over] - PENALTY_CALORIES)
+    log5 = log_diff / math.log(5)
+    log25 = log_diff / math.log(25)
+    valid = np.isfinite(log5) & (log5 > 0)
+    penalized = np.where(raw_scores[over] >= 0, 1.0 / np.where(valid, log5, 1.0), log25)
+    factor[over] = np.where(valid, penalized, 1.0)
+    return factor
+
+
+def score_items_batched(coeffs: np.ndarray, calories: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """rawScore and penalizedScore of each item, given the finalCoeffs row of its restaurant."""
+    raw = evaluate_quartic_batched(coeffs, calories)
+    return raw, raw * penalty_factor_batched(calories, raw)
+
+
+def restaurant_power_sums(
+    codes: np.ndarray,
+    calories: np.ndarray,
+    nutrients: List[np.ndarray],
+    n_groups: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sufficient statistics of every (restaurant, nutrient) fit, over items with calories > 0.
+    - codes: restaurant code per item (0..n_groups-1)
+    - calories: calories per item
+    - nutrients: one array of per-item values for each key in NUTRIENT_KEYS
+    Returns s_x_pow (n_groups, 9) with sum(x^0..x^8) and s_xy_pow
+    (n_groups, len(NUTRIENT_KEYS), 5) with sum(x^k * y) for k=0..4, where
+    y is the nutrient per calorie. Sums of disjoint item sets simply add up.
+    """
+    s_x_pow = np.zeros((n_groups, 9))
+    s_xy_pow = np.zeros((n_groups, len(NUTRIENT_KEYS), 5))
+
+    positive = calories > 0
+    xs = calories[positive]
+    groups = codes[positive]
+    if len(xs) == 0:
+        return s_x_pow, s_xy_pow
+
+    ratios = []
+    for values in nutrients:
+        values = values[positive]
+        with np.errstate(all="ignore"):
+            ratios.append(np.where(np.isfinite(values), values / xs, 0.0))
+
+    # Powers x^0..x^8, built by repeated multiplication like fit_quartic
+    x_pow = np.empty((9, len(xs)))
+    x_pow[0] = 1.0
+    for k in range(1, 9):
+        np.multiply(x_pow[k - 1], xs, out=x_pow[k])
+
+    # bincount accumulates in item order, matching the scalar running sums
+    for k in range(9):
+        s_x_pow[:, k] = np.bincount(groups, weights=x_pow[k], minlength=n_groups)
+    for j in range(len(NUTRIENT_KEYS)):
+        for k in range(5):
+            s_xy_pow[:, j, k] = np.bincount(groups, weights=x_pow[k] * ratios[j], minlength=n_groups)
+
+    return s_x_pow, s_xy_pow
+
+
+def solve_power_sums(s_x_pow: np.ndarray, s_xy_pow: np.ndarray) -> np.ndarray:
+    """Solves every normal-equation system built from restaurant_power_sums in one stacked call."""
+    hankel = np.add.outer(np.arange(5), np.arange(5))
+    A = np.broadcast_to(
+        s_x_pow[:, hankel][:, None, :, :],
+        s_xy_pow.shape[:2] + (5, 5),
+    )
+    return solve_normal_equations_5_batched(A, s_xy_pow)
+
+
+def combine_shifted_fits(coeffs: np.ndarray, min_y: np.ndarray, max_y: np.ndarray) -> np.ndarray:
+    """
+    Shifts each nutrient fit to its target and sums them into finalCoeffs.
+    - coeffs: (restaurants, len(NUTRIENT_KEYS), 5) fitted quartics
+    - min_y / max_y: (restaurants, len(NUTRIENT_KEYS)) extrema of those fits
+    Bad nutrients are shifted so their minimum is BAD_TARGET_MIN, good ones
+    so their maximum is GOOD_TARGET_MAX, in the same order as the scalar path.
+    """
+    final_coeffs = np.zeros((len(coeffs), 5))
+    for j, key in enumerate(NUTRIENT_KEYS):
+        if key in BAD_KEYS:
+            extreme, target = min_y[:, j], BAD_TARGET_MIN
+        else:
+            extreme, target = max_y[:, j], GOOD_TARGET_MAX
+        shifted = coeffs[:, j].copy()
+        shifted[:, 0] += np.where(np.isfinite(extreme), target - extreme, 0.0)
+        final_coeffs = final_coeffs + shifted
+    return final_coeffs
+
+
+def fit_restaurant_quartics(
+    codes: np.ndarray,
+    calories: np.ndarray,
+    nutrients: List[np.ndarray],
+    n_groups: int,
+    sampled_extrema: bool = False,
+) -> np.ndarray:
+    """
+    Batched fit engine behind analyze_fast_food_data.
+    Takes the same arguments as restaurant_power_sums, solves all 5x5 systems
+    in one stacked call, shifts each fit and returns the combined finalCoeffs
+    per restaurant as a (n_groups, 5) array. Restaurants without any item
+    above 0 calories keep all-zero coefficients.
+    - sampled_extrema: shift fits by their extremum over the item calories
+      instead of the analytic extremum over [min, max] calories
+    """
+    final_coeffs = np.zeros((n_groups, 5))
+
+    s_x_pow, s_xy_pow = restaurant_power_sums(codes, calories, nutrients, n_groups)
+    fitted = np.flatnonzero(s_x_pow[:, 0] > 0)
+    if len(fitted) == 0:
+        return final_coeffs
+
+    coeffs = solve_power_sums(s_x_pow[fitted], s_xy_pow[fitted])
+
+    positive = calories > 0
+    groups = codes[positive]
+    order = np.argsort(groups, kind="stable")
+    sorted_groups = np.searchsorted(fitted, groups[order])
+    sorted_xs = calories[positive][order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+
+    if sampled_extrema:
+        min_y = np.empty((len(fitted), len(NUTRIENT_KEYS)))
+        max_y = np.empty((len(fitted), len(NUTRIENT_KEYS)))
+        for j in range(len(NUTRIENT_KEYS)):
+            values = evaluate_quartic_batched(coeffs[sorted_groups, j], sorted_xs)
+            min_y[:, j] = np.minimum.reduceat(values, starts)
+            max_y[:, j] = np.maximum.reduceat(values, starts)
+    else:
+        lo = np.minimum.reduceat(sorted_xs, starts)
+        hi = np.maximum.reduceat(sorted_xs, starts)
+        min_y, max_y = quartic_extrema_batched(coeffs, lo[:, None], hi[:, None])
+
+    final_coeffs[fitted] = combine_shifted_fits(coeffs, min_y, max_y)
+    return final_coeffs
+
+
+def record_key(record: FoodRecord) -> tuple:
+    """Hashable value of a record (or row view), for matching equal records."""
+    return tuple(getattr(record, name) for name in RECORD_FIELDS)
+
+
+def record_arrays(records: List[FoodRecord]) -> Tuple[List[str], np.ndarray, np.ndarray, List[np.ndarray]]:
+    """
+    Array form of records for the batched helpers.
+    Returns (restaurant names in first-seen order, restaurant code per record,
+    calories, one array per key in NUTRIENT_KEYS).
+    """
+    n = len(records)
+    index_of: Dict[str, int] = {}
+    codes = np.fromiter(
+        (index_of.setdefault(rec.restaurant, len(index_of)) for rec in records),
+        dtype=np.intp,
+        count=n,
+    )
+    calories = np.fromiter((rec.calories for rec in records), dtype=float, count=n)
+    nutrients = [
+        np.fromiter((getattr(rec, key) for rec in records), dtype=float, count=n)
+        for key in NUTRIENT_KEYS
+    ]
+    return list(index_of), codes, calories, nutrients
+
+
+def analyze_arrays(
+    restaurant_names: List[str],
+    codes: np.ndarray,
+    calories: np.ndarray,
+    nutrients: List[np.ndarray],
+    make_items: Callable[[np.ndarray, np.ndarray, np.ndarray], Sequence[ItemScore]],
+    sampled_extrema: bool = False,
+) -> Optional[AnalysisResult]:
+    """
+    Batched analysis over array inputs (see record_arrays for their layout).
+    make_items(rows, raw, penalized) builds the items of one restaurant from
+    its row indices and the full rawScore / penalizedScore arrays.
+    Restaurants without rows are left out of the result.
+    """
+    if not (calories > 0).any():
+        return None
+
+    final_coeffs = fit_restaurant_quartics(codes, calories, nutrients, len(restaurant_names), sampled_extrema)
+    return score_restaurants(restaurant_names, codes, calories, final_coeffs, make_items)
+
+
+def score_restaurants(
+    restaurant_names: List[str],
+    codes: np.ndarray,
+    calories: np.ndarray,
+    final_coeffs: np.ndarray,
+    make_items: Callable[[np.ndarray, np.ndarray, np.ndarray], Sequence[ItemScore]],
+) -> Optional[AnalysisResult]:
+    """
+    Scores every item with its restaurant's row of final_coeffs (n_groups, 5)
+    and ranks the restaurants; the second half of analyze_arrays.
+    """
+    positive = calories[calories > 0]
+    if len(positive) == 0:
+        return None
+
+    n_groups = len(restaurant_names)
+    raw, penalized = score_items_batched(final_coeffs[codes], calories)
+    scores = np.bincount(codes, weights=penalized, minlength=n_groups)
+
+    order = np.argsort(codes, kind="stable")
+    bounds = np.cumsum(np.bincount(codes, minlength=n_groups))[:-1]
+
+    restaurants: List[RestaurantScoreResult] = []
+    for code, (restaurant, rows) in enumerate(zip(restaurant_names, np.split(order, bounds))):
+        if len(rows) == 0:
+            continue
+        restaurants.append(
+            RestaurantScoreResult(
+                restaurant=restaurant,
+                itemCount=len(rows),
+                score=float(scores[code]),
+                finalCoeffs=tuple(float(c) for c in final_coeffs[code]),
+                items=make_items(rows, raw, penalized),
+            )
+        )
+
+    restaurants.sort(key=lambda r: r.score, reverse=True)
+
+    return AnalysisResult(
+        restaurants=restaurants,
+        minCalories=float(positive.min()),
+        maxCalories=float(positive.max()),
+    )
+
+
+def _analyze_batched(records: List[FoodRecord], sampled_extrema: bool = False) -> Optional[AnalysisResult]:
+    if not records:
+        return None
+
+    def make_items(rows: np.ndarray, raw: np.ndarray, penalized: np.ndarray) -> List[ItemScore]:
+        return [
+            ItemScore(item=records[i], rawScore=float(raw[i]), penalizedScore=float(penalized[i]))
+            for i in rows
+        ]
+
+    return analyze_arrays(*record_arrays(records), make_items, sampled_extrema)
+
+
+def analyze_fast_food_data(
+    records: List[FoodRecord],
+    engine: str = "batched",
+    sampled_extrema: bool = False,
+) -> Optional[AnalysisResult]:
+    """
+    Scores every restaurant with the combined quartic model.
+    - engine="batched" (default): fits all restaurants and nutrients at once with NumPy
+    - engine="scalar": the original one-fit-at-a-time path, kept for parity checks
+    - sampled_extrema=True: shift each fit by its extremum over the item calories
+      (original behavior) instead of the analytic extremum over the calorie range
+    """
+    if engine == "batched":
+        return _analyze_batched(records, sampled_extrema)
+    if engine == "scalar":
+        return _analyze_scalar(records, sampled_extrema)
+    raise ValueError(f"Unknown analysis engine: {engine!r}")
+
+
 def parse_fast_food_csv(csv_text: str) -> List[FoodRecord]:
+    return [FoodRecord(*row) for row in iter_fast_food_rows(csv_text)]
+
+
+def iter_fast_food_rows(csv_text: str) -> Iterator[tuple]:
+    return iter_fast_food_lines(csv_text.splitlines())
+
+
+def iter_fast_food_lines(lines: Iterable[str]) -> Iterator[tuple]:
     """
+    Yields one tuple of RECORD_FIELDS values per valid row of CSV lines.
+    Lines are consumed lazily, so any line iterator can be streamed through.
     Mirrors parseFastFoodCsv in TS:
     - Accepts headers:
       restaurant,
@@ -326,12 +798,13 @@ def parse_fast_food_csv(csv_text: str) -> List[FoodRecord]:
       calcium
     """
     # Normalize lines: strip whitespace and skip empty
-    lines = [line.strip() for line in csv_text.splitlines() if line.strip()]
-    if len(lines) < 2:
-        return []
+    lines = (line for line in (raw.strip() for raw in lines) if line)
+    first_lines = list(itertools.islice(lines, 2))
+    if len(first_lines) < 2:
+        return
 
     # Use csv module to handle commas properly
-    reader = csv.reader(lines)
+    reader = csv.reader(itertools.chain(first_lines, lines))
     header_row = next(reader)
     header = [h.strip().lower() for h in header_row]
 
@@ -390,8 +863,6 @@ def parse_fast_food_csv(csv_text: str) -> List[FoodRecord]:
         except ValueError:
             return 0.0
 
-    records: List[FoodRecord] = []
-
     for parts in reader:
         # Ignore rows with mismatched column counts
         if len(parts) != len(header):
@@ -404,22 +875,18 @@ def parse_fast_food_csv(csv_text: str) -> List[FoodRecord]:
         if not restaurant or not item:
             continue
 
-        records.append(
-            FoodRecord(
-                restaurant=restaurant,
-                item=item,
-                calories=calories,
-                sodium=to_num(parts[col_sodium]),
-                saturated_fat=to_num(parts[col_sat_fat]),
-                trans_fat=to_num(parts[col_trans_fat]),
-                cholesterol=to_num(parts[col_chol]),
-                sugars=to_num(parts[col_sugars]),
-                fiber=to_num(parts[col_fiber]),
-                protein=to_num(parts[col_protein]),
-                vitamin_a=to_num(parts[col_vit_a]),
-                vitamin_c=to_num(parts[col_vit_c]),
-                calcium=to_num(parts[col_calcium]),
-            )
+        yield (
+            restaurant,
+            item,
+            calories,
+            to_num(parts[col_sodium]),
+            to_num(parts[col_sat_fat]),
+            to_num(parts[col_trans_fat]),
+            to_num(parts[col_chol]),
+            to_num(parts[col_sugars]),
+            to_num(parts[col_fiber]),
+            to_num(parts[col_protein]),
+            to_num(parts[col_vit_a]),
+            to_num(parts[col_vit_c]),
+            to_num(parts[col_calcium]),
         )
-
-    return records
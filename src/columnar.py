@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import contextlib
+import itertools
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, Union, overload
+
+import numpy as np
+import pandas as pd
+
+from src.analyzer import (
+    NUTRIENT_KEYS,
+    RECORD_FIELDS,
+    AnalysisResult,
+    FoodRecord,
+    ItemScore,
+    analyze_arrays,
+    iter_fast_food_lines,
+    iter_fast_food_rows,
+)
+
+# Numeric FoodRecord fields, each stored as one float64 array
+NUMERIC_FIELDS: List[str] = ["calories"] + NUTRIENT_KEYS
+
+# Streaming ingestion: characters per read, and rows per column batch
+DEFAULT_CHUNK_SIZE = 1 << 20
+DEFAULT_BATCH_ROWS = 65536
+
+
+def _column_property(name: str) -> property:
+    def get(self: "FoodRow") -> float:
+        return float(self._columns.values[name][self._index])
+    return property(get)
+
+
+class FoodRow:
+    """Read-only view of one FoodColumns row, with the same attributes as FoodRecord."""
+
+    __slots__ = ("_columns", "_index")
+
+    def __init__(self, columns: "FoodColumns", index: int):
+        self._columns = columns
+        self._index = int(index)
+
+    @property
+    def restaurant(self) -> str:
+        return self._columns.restaurants[self._columns.restaurant_codes[self._index]]
+
+    @property
+    def item(self) -> str:
+        return self._columns.item_names[self._columns.item_codes[self._index]]
+
+    calories = _column_property("calories")
+    sodium = _column_property("sodium")
+    saturated_fat = _column_property("saturated_fat")
+    trans_fat = _column_property("trans_fat")
+    cholesterol = _column_property("cholesterol")
+    sugars = _column_property("sugars")
+    fiber = _column_property("fiber")
+    protein = _column_property("protein")
+    vitamin_a = _column_property("vitamin_a")
+    vitamin_c = _column_property("vitamin_c")
+    calcium = _column_property("calcium")
+
+    def to_record(self) -> FoodRecord:
+        return FoodRecord(*(getattr(self, name) for name in RECORD_FIELDS))
+
+    def __repr__(self) -> str:
+        return f"FoodRow({self.restaurant!r}, {self.item!r}, calories={self.calories})"
+
+
+class FoodColumns(Sequence[FoodRow]):
+    """
+    Struct-of-arrays store of food records.
+    - restaurant_codes: int32 code per row into the `restaurants` table
+    - item_codes: int32 code per row into the interned `item_names` table
+    - values: one float64 array per NUMERIC_FIELDS entry
+    Indexing or iterating yields FoodRow views, so the store can stand in for
+    a list of FoodRecord where row access is still needed.
+    """
+
+    def __init__(
+        self,
+        restaurants: List[str],
+        restaurant_codes: np.ndarray,
+        item_names: List[str],
+        item_codes: np.ndarray,
+        values: Dict[str, np.ndarray],
+    ):
+        self.restaurants = restaurants
+        self.restaurant_codes = restaurant_codes
+        self.item_names = item_names
+        self.item_codes = item_codes
+        self.values = values
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> "FoodColumns":
+        """Builds a store from tuples of RECORD_FIELDS values."""
+        builder = FoodColumnsBuilder()
+        builder.append_rows(rows)
+        return builder.build()
+
+    @classmethod
+    def from_records(cls, records: Iterable[FoodRecord]) -> "FoodColumns":
+        return cls.from_rows(
+            tuple(getattr(rec, name) for name in RECORD_FIELDS) for rec in records
+        )
+
+    def __len__(self) -> int:
+        return len(self.restaurant_codes)
+
+    @overload
+    def __getitem__(self, index: int) -> FoodRow: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[FoodRow]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [FoodRow(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("FoodColumns index out of range")
+        return FoodRow(self, index)
+
+    def __iter__(self) -> Iterator[FoodRow]:
+        return (FoodRow(self, i) for i in range(len(self)))
+
+    def nutrients(self) -> List[np.ndarray]:
+        """Nutrient arrays in NUTRIENT_KEYS order, as the batched analyzer expects."""
+        return [self.values[key] for key in NUTRIENT_KEYS]
+
+    def take(self, indices: np.ndarray) -> "FoodColumns":
+        """New store with the given rows, sharing the restaurant and item tables."""
+        return FoodColumns(
+            restaurants=self.restaurants,
+            restaurant_codes=self.restaurant_codes[indices],
+            item_names=self.item_names,
+            item_codes=self.item_codes[indices],
+            values={name: column[indices] for name, column in self.values.items()},
+        )
+
+    def concat(self, other: "FoodColumns") -> "FoodColumns":
+        """
+        New store with other's rows after this one's. Names that other
+        introduces are appended to the restaurant and item tables, so this
+        store's codes stay valid.
+        """
+        restaurants, restaurant_codes = _merge_names(self.restaurants, other.restaurants)
+        item_names, item_codes = _merge_names(self.item_names, other.item_names)
+        return FoodColumns(
+            restaurants=restaurants,
+            restaurant_codes=np.concatenate([self.restaurant_codes, restaurant_codes[other.restaurant_codes]]),
+            item_names=item_names,
+            item_codes=np.concatenate([self.item_codes, item_codes[other.item_codes]]),
+            values={name: np.concatenate([column, other.values[name]]) for name, column in self.values.items()},
+        )
+
+    def sorted_by_restaurant(self) -> "FoodColumns":
+        """
+        Copy with the restaurants table in name order and rows sorted by
+        restaurant, then calories, so each restaurant is one contiguous run
+        of ascending calories (see RestaurantCalorieIndex). Restaurants
+        without rows are dropped from the table.
+        """
+        present = np.bincount(self.restaurant_codes, minlength=len(self.restaurants)) > 0
+        restaurants = sorted(name for name, used in zip(self.restaurants, present) if used)
+        rank = {name: code for code, name in enumerate(restaurants)}
+        recode = np.array([rank.get(name, -1) for name in self.restaurants], dtype=np.int32)
+        codes = recode[self.restaurant_codes] if len(self.restaurants) else self.restaurant_codes
+        order = np.lexsort((self.values['calories'], codes))
+        return FoodColumns(
+            restaurants=restaurants,
+            restaurant_codes=codes[order],
+            item_names=self.item_names,
+            item_codes=self.item_codes[order],
+            values={name: column[order] for name, column in self.values.items()},
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        DataFrame over the store without copying the numeric columns.
+        restaurant and item are categoricals built from the code arrays.
+        """
+        data = {
+            'restaurant': pd.Categorical.from_codes(self.restaurant_codes, categories=self.restaurants),
+            'item': pd.Categorical.from_codes(self.item_codes, categories=pd.Index(self.item_names, dtype=object)),
+        }
+        data.update(self.values)
+        return pd.DataFrame(data, copy=False)
+
+    def read_only(self) -> "FoodColumns":
+        """Marks every column array non-writeable (snapshot memory maps already are) and returns self."""
+        for column in (self.restaurant_codes, self.item_codes, *self.values.values()):
+            column.flags.writeable = False
+        return self
+
+
+def _merge_names(table: List[str], names: List[str]) -> Tuple[List[str], np.ndarray]:
+    """table extended with the names it lacks, and the code of every name in the result."""
+    codes = pd.Index(table, dtype=object).get_indexer(names) if table else np.full(len(names), -1)
+    missing = np.flatnonzero(codes < 0)
+    codes[missing] = len(table) + np.arange(len(missing))
+    return table + [names[i] for i in missing], codes.astype(np.int32)
+
+
+class FoodColumnsBuilder:
+    """
+    Accumulates column batches into a FoodColumns store.
+    Restaurant and item names are interned as they arrive; numeric values are
+    kept as compact float64 chunks, so only the current batch is held as
+    Python objects.
+    """
+
+    def __init__(self):
+        self._restaurant_codes: Dict[str, int] = {}
+        self._item_codes: Dict[str, int] = {}
+        self._chunks: Dict[str, List[np.ndarray]] = {name: [] for name in RECORD_FIELDS}
+
+    def append_batch(self, batch: Dict[str, Sequence]) -> None:
+        """Appends one batch: a sequence of values for each RECORD_FIELDS name."""
+        n = len(batch['restaurant'])
+        for name, table in (('restaurant', self._restaurant_codes), ('item', self._item_codes)):
+            self._chunks[name].append(np.fromiter(
+                (table.setdefault(value, len(table)) for value in batch[name]),
+                dtype=np.int32,
+                count=n,
+            ))
+        for name in NUMERIC_FIELDS:
+            self._chunks[name].append(np.asarray(batch[name], dtype=float))
+
+    def append_rows(self, rows: Iterable[tuple], batch_rows: int = DEFAULT_BATCH_ROWS) -> None:
+        for batch in iter_row_batches(rows, batch_rows):
+            self.append_batch(batch)
+
+    def build(self) -> FoodColumns:
+        def concat(name: str, dtype) -> np.ndarray:
+            chunks = self._chunks[name]
+            return np.concatenate(chunks) if chunks else np.empty(0, dtype=dtype)
+
+        return FoodColumns(
+            restaurants=list(self._restaurant_codes),
+            restaurant_codes=concat('restaurant', np.int32),
+            item_names=list(self._item_codes),
+            item_codes=concat('item', np.int32),
+            values={name: concat(name, float) for name in NUMERIC_FIELDS},
+        )
+
+
+def iter_row_batches(rows: Iterable[tuple], batch_rows: int = DEFAULT_BATCH_ROWS) -> Iterator[Dict[str, tuple]]:
+    """Groups tuples of RECORD_FIELDS values into column batches of up to batch_rows rows."""
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, batch_rows))
+        if not chunk:
+            return
+        yield dict(zip(RECORD_FIELDS, zip(*chunk)))
+
+
+def iter_chunked_lines(f: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """Lines of a text file, read in fixed-size chunks rather than all at once."""
+    pending = ""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        lines = (pending + chunk).splitlines(keepends=True)
+        # Hold back a trailing partial line until the next chunk completes it
+        pending = lines.pop() if lines[-1].splitlines() == [lines[-1]] else ""
+        yield from lines
+    if pending:
+        yield pending
+
+
+def iter_fast_food_batches(
+    source: Union[str, os.PathLike, TextIO],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+) -> Iterator[Dict[str, tuple]]:
+    """
+    Streams a fast food CSV as column batches.
+    - source: path, or text-mode file object (left open)
+    - Same header aliases and row skipping as parse_fast_food_csv
+    """
+    if isinstance(source, (str, os.PathLike)):
+        context = open(source, 'r')
+    else:
+        context = contextlib.nullcontext(source)
+    with context as f:
+        yield from iter_row_batches(iter_fast_food_lines(iter_chunked_lines(f, chunk_size)), batch_rows)
+
+
+def read_fast_food_columns(
+    source: Union[str, os.PathLike, TextIO],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+) -> FoodColumns:
+    """Loads a fast food CSV into a columnar store in bounded extra memory."""
+    builder = FoodColumnsBuilder()
+    for batch in iter_fast_food_batches(source, chunk_size, batch_rows):
+        builder.append_batch(batch)
+    return builder.build()
+
+
+def parse_fast_food_columns(csv_text: str) -> FoodColumns:
+    """parse_fast_food_csv, straight into a columnar store."""
+    return FoodColumns.from_rows(iter_fast_food_rows(csv_text))
+
+
+class ItemScoreList(Sequence[ItemScore]):
+    """Items of one restaurant, materialized as ItemScore only when accessed."""
+
+    __slots__ = ("_columns", "_rows", "_raw", "_penalized")
+
+    def __init__(self, columns: FoodColumns, rows: np.ndarray, raw: np.ndarray, penalized: np.ndarray):
+        self._columns = columns
+        self._rows = rows
+        self._raw = raw
+        self._penalized = penalized
+
+    @property
+    def rows(self) -> np.ndarray:
+        return self._rows
+
+    @property
+    def raw_scores(self) -> np.ndarray:
+        """rawScore of every row in the store, not just this restaurant's."""
+        return self._raw
+
+    @property
+    def penalized_scores(self) -> np.ndarray:
+        """penalizedScore of every row in the store, not just this restaurant's."""
+        return self._penalized
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        row = self._rows[index]
+        return ItemScore(
+            item=FoodRow(self._columns, row),
+            rawScore=float(self._raw[row]),
+            penalizedScore=float(self._penalized[row]),
+        )
+
+
+def analyze_columns(columns: FoodColumns, sampled_extrema: bool = False) -> Optional[AnalysisResult]:
+    """analyze_fast_food_data over a columnar store; items are lazy views, not copies."""
+    if not len(columns):
+        return None
+
+    def make_items(rows: np.ndarray, raw: np.ndarray, penalized: np.ndarray) -> ItemScoreList:
+        return ItemScoreList(columns, rows, raw, penalized)
+
+    return analyze_arrays(
+        columns.restaurants,
+        columns.restaurant_codes,
+        columns.values['calories'],
+        columns.nutrients(),
+        make_items,
+        sampled_extrema,
+    )
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import zlib
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - Parquet and Arrow exports need pyarrow
+    pa = None
+    pq = None
+
+# format -> (mimetype, file extension)
+EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    'csv': ('application/gzip', 'csv.gz'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+
+def available_formats() -> List[str]:
+    return [fmt for fmt in EXPORT_FORMATS if fmt == 'csv' or pa is not None]
+
+
+class Drain:
+    """Write-only, unseekable file object whose contents are handed out (and forgotten) by take()."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _csv_gzip(chunks: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31)
+    header = True
+    for chunk in chunks:
+        data = gzip.compress(chunk.to_csv(index=False, header=header).encode())
+        header = False
+        if data:
+            yield data
+    yield gzip.flush()
+
+
+def _arrow_table(chunk: pd.DataFrame) -> "pa.Table":
+    """
+    Arrow table of a chunk with categorical columns as plain strings.
+    Converted as they are, categoricals would carry their whole category
+    table (every item name in the dataset) into every chunk.
+    """
+    plain = [name for name in chunk.columns if isinstance(chunk[name].dtype, pd.CategoricalDtype)]
+    table = pa.Table.from_pandas(chunk.assign(**{name: chunk[name].astype(object) for name in plain}),
+                                 preserve_index=False)
+    # An empty object column comes out as the null type; keep one schema across chunks
+    schema = table.schema
+    for name in plain:
+        schema = schema.set(schema.get_field_index(name), pa.field(name, pa.string()))
+    return table.cast(schema)
+
+
+def _arrow_batches(chunks: Iterable[pd.DataFrame], open_writer) -> Iterator[bytes]:
+    sink = Drain()
+    writer = None
+    for chunk in chunks:
+        table = _arrow_table(chunk)
+        if writer is None:
+            writer = open_writer(sink, table.schema)
+        writer.write_table(table)
+        yield sink.take()
+    if writer is not None:
+        writer.close()
+    yield sink.take()
+
+
+def stream_export(chunks: Iterable[pd.DataFrame], fmt: str) -> Iterator[bytes]:
+    """
+    Encoded bytes of the rows in `chunks`, produced one chunk at a time.
+    - csv: gzip-compressed CSV with a single header row
+    - parquet: one row group per chunk; the footer comes last
+    - arrow: Arrow IPC stream, one record batch per chunk
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}")
+    if fmt == 'csv':
+        return _csv_gzip(chunks)
+    if pa is None:
+        raise ValueError(f"{fmt} export needs pyarrow")
+    if fmt == 'parquet':
+        return _arrow_batches(chunks, lambda sink, schema: pq.ParquetWriter(sink, schema))
+    return _arrow_batches(chunks, lambda sink, schema: pa.ipc.new_stream(sink, schema))
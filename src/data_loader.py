@@ -1,41 +1,69 @@
 # src/data_loader.py
-import csv
+import time
 from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
 import pandas as pd
 
 DATA_DIR = Path(__file__).parent.parent / "data"
 CSV_PATH = DATA_DIR / "fastfood.csv"
 
-def load_data() -> pd.DataFrame:
+# Positions kept from the raw file: restaurant..protein, then salad
+KEPT_COLUMNS = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 16]
+# Positions (within the kept columns) normalized per calorie: cal_fat..sugar
+PER_CALORIE_COLUMNS = slice(3, 12)
+CALORIES_COLUMN = 2
+SALAD_COLUMN = 13
+
+
+def _default_engine() -> str:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return "c"
+    return "pyarrow"
+
+
+def load_data(path: Union[str, Path] = CSV_PATH, engine: Optional[str] = None) -> pd.DataFrame:
     """
     Loads the fastfood.csv file correctly even with quoted commas in item names.
     Returns a clean DataFrame with proper numeric types.
+    - engine: pandas CSV engine; defaults to "pyarrow" when installed, else "c"
+    - Nutrient columns cal_fat..sugar are divided by calories (0 where calories is 0)
+    - salad is mapped to 1 for "Yes" and 0 otherwise
+    - Per-stage timings in seconds are stored in df.attrs["timings"]
     """
-    if not CSV_PATH.exists():
-        raise FileNotFoundError(f"CSV not found at {CSV_PATH}")
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"CSV not found at {path}")
 
-    # This regex handles commas inside quotes perfectly
+    engine = engine or _default_engine()
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+
+    # Both engines honor quotes, so commas inside item names are safe
     food_allData = pd.read_csv(
-        CSV_PATH,
-        sep=r',\s*(?=(?:[^"]*"[^"]*")*[^"]*$)',
-        engine="python",
-        on_bad_lines="skip",   # pandas <2.0
-        # on_bad_lines="warn"  # uncomment if using pandas >=2.0
+        path,
+        engine=engine,
+        on_bad_lines="skip",
+        **({} if engine == "pyarrow" else {"skipinitialspace": True}),
     )
-    fast_food = food_allData.iloc[:, [0,1,2,3,4,5,6,7,8,9,10,11,12,16]]
-    for i in range(len(fast_food)):
-    if fast_food.iloc[i, 13] == "Yes":
-        fast_food.iloc[i, 13] = 1
-    else:
-        fast_food.iloc[i, 13] = 0
-    for i in range(len(fast_food)):
-        fast_food.iloc[i, 3] /= fast_food.iloc[i, 2]
-        fast_food.iloc[i, 4] /= fast_food.iloc[i, 2]
-        fast_food.iloc[i, 5] /= fast_food.iloc[i, 2]
-        fast_food.iloc[i, 6] /= fast_food.iloc[i, 2]
-        fast_food.iloc[i, 7] /= fast_food.iloc[i, 2]
-        fast_food.iloc[i, 8] /= fast_food.iloc[i, 2]
-        fast_food.iloc[i, 9] /= fast_food.iloc[i, 2]
-        fast_food.iloc[i, 10] /= fast_food.iloc[i, 2]
-        fast_food.iloc[i, 11] /= fast_food.iloc[i, 2]
+    timings["read_csv"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast_food = food_allData.iloc[:, KEPT_COLUMNS].copy()
+    salad = fast_food.columns[SALAD_COLUMN]
+    fast_food[salad] = (fast_food[salad] == "Yes").astype(np.int64)
+    timings["salad"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    calories = fast_food.iloc[:, CALORIES_COLUMN].to_numpy(dtype=float)
+    has_calories = calories != 0
+    for column in fast_food.columns[PER_CALORIE_COLUMNS]:
+        values = fast_food[column].to_numpy(dtype=float)
+        fast_food[column] = np.divide(values, calories, out=np.zeros_like(values), where=has_calories)
+    timings["per_calorie"] = time.perf_counter() - start
+
+    fast_food.attrs["timings"] = timings
     return fast_food
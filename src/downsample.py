@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Sequence, Tuple
+
+import numpy as np
+
+
+def _rank_in_group(codes: np.ndarray, order: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """For rows visited in `order` (grouped by code), each row's rank within its group and the group size."""
+    grouped = codes[order]
+    starts = np.flatnonzero(np.r_[True, grouped[1:] != grouped[:-1]])
+    sizes = np.diff(np.r_[starts, len(order)])
+    rank = np.arange(len(order)) - np.repeat(starts, sizes)
+    return rank, np.repeat(sizes, sizes)
+
+
+def stratified_sample(
+    codes: np.ndarray,
+    budget: int,
+    extremes: Sequence[np.ndarray] = (),
+    n_extreme: int = 3,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Sorted row positions of a sample of about `budget` rows.
+    - Every group (same code) keeps its n_extreme lowest and highest rows of
+      each array in `extremes`, so outliers survive the sampling; if those
+      alone exceed the budget, a random share of them is kept plus the
+      overall extremes
+    - The rest of the budget is split across groups in proportion to their
+      size and filled at random; the seed makes it repeatable
+    - With len(codes) <= budget every row is returned
+    """
+    n = len(codes)
+    if n <= budget:
+        return np.arange(n)
+
+    rng = np.random.default_rng(seed)
+    keep = np.zeros(n, dtype=bool)
+    for values in extremes:
+        order = np.lexsort((values, codes))
+        rank, size = _rank_in_group(codes, order)
+        keep[order[(rank < n_extreme) | (rank >= size - n_extreme)]] = True
+
+    if keep.sum() > budget:
+        kept = np.flatnonzero(keep)
+        keep[:] = False
+        keep[rng.choice(kept, budget, replace=False)] = True
+        for values in extremes:
+            keep[[values.argmin(), values.argmax()]] = True
+
+    remaining = budget - int(keep.sum())
+    if remaining > 0:
+        candidates = np.flatnonzero(~keep)
+        cand_codes = codes[candidates]
+        priority = rng.random(len(candidates))
+        order = np.lexsort((priority, cand_codes))
+        rank, size = _rank_in_group(cand_codes, order)
+        quota = np.floor(size * (remaining / len(candidates))).astype(np.intp)
+        keep[candidates[order[rank < quota]]] = True
+
+    return np.flatnonzero(keep)
+
+
+def density_grid(
+    x: np.ndarray,
+    y: np.ndarray,
+    bins: int = 100,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    2D histogram of (x, y) for density plots.
+    Returns (x bin centers, y bin centers, counts indexed [y, x]), with empty
+    bins as NaN so they render transparent.
+    """
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    counts = counts.T
+    counts[counts == 0] = np.nan
+    return (x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2, counts
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# Arrays shorter than this stay as plain JSON lists
+MIN_TYPED_ARRAY = 8
+# Significant digits kept, relative to the largest magnitude in each array;
+# finer than any axis position or hover label shows
+DISPLAY_DIGITS = 5
+
+# Narrowest dtypes plotly.js typed arrays accept, tried in order for integral data
+_INT_DTYPES = [np.int8, np.uint8, np.int16, np.uint16, np.int32, np.uint32]
+_PLOTLY_DTYPES = {
+    np.dtype(np.int8): 'i1', np.dtype(np.uint8): 'u1',
+    np.dtype(np.int16): 'i2', np.dtype(np.uint16): 'u2',
+    np.dtype(np.int32): 'i4', np.dtype(np.uint32): 'u4',
+    np.dtype(np.float32): 'f4', np.dtype(np.float64): 'f8',
+}
+
+
+def dumps(obj: Any) -> bytes:
+    """JSON bytes, via orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+def loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def decode_typed_array(value: Dict) -> np.ndarray:
+    """numpy array of a plotly {'dtype', 'bdata', 'shape'} typed-array dict."""
+    array = np.frombuffer(base64.b64decode(value['bdata']), dtype=value['dtype'])
+    shape = value.get('shape')
+    if shape is not None:
+        if isinstance(shape, str):
+            shape = [int(n) for n in shape.split(',')]
+        array = array.reshape(shape)
+    return array
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _as_numeric(value: Any) -> Optional[np.ndarray]:
+    """Array of a typed-array dict, a numeric list, or a rectangular list of numeric rows."""
+    if isinstance(value, dict) and 'bdata' in value and 'dtype' in value:
+        return decode_typed_array(value)
+    if not isinstance(value, (list, tuple)) or not value:
+        return None
+    if len(value) >= MIN_TYPED_ARRAY and all(_is_number(v) for v in value):
+        return np.asarray(value, dtype=float)
+    if (all(isinstance(row, (list, tuple)) for row in value) and len({len(row) for row in value}) == 1
+            and len(value) * len(value[0]) >= MIN_TYPED_ARRAY
+            and all(_is_number(v) for row in value for v in row)):
+        return np.asarray(value, dtype=float)
+    return None
+
+
+def round_to_display(array: np.ndarray) -> np.ndarray:
+    """Float array rounded to DISPLAY_DIGITS significant digits of its largest finite magnitude."""
+    magnitudes = np.abs(array[np.isfinite(array)])
+    if not magnitudes.size or magnitudes.max() == 0:
+        return array
+    decimals = DISPLAY_DIGITS - 1 - int(np.floor(np.log10(magnitudes.max())))
+    return np.round(array, decimals)
+
+
+def compact_array(array: np.ndarray) -> np.ndarray:
+    """
+    Narrowest dtype that shows the same values.
+    - Floats are first rounded to display precision (round_to_display)
+    - Integral data goes to the smallest int type that holds its range
+    - Other floats go to float32, which is finer than any axis or hover label
+    """
+    if array.dtype.kind == 'f':
+        array = round_to_display(array)
+    if array.dtype.kind in 'iu' or (array.dtype.kind == 'f' and np.isfinite(array).all()
+                                    and np.array_equal(array, np.round(array))):
+        lo, hi = (array.min(), array.max()) if array.size else (0, 0)
+        for dtype in _INT_DTYPES:
+            info = np.iinfo(dtype)
+            if info.min <= lo and hi <= info.max:
+                return array.astype(dtype)
+    if array.dtype.kind == 'f':
+        return array.astype(np.float32)
+    return array
+
+
+def encode_typed_array(array: np.ndarray) -> Dict:
+    array = np.ascontiguousarray(array)
+    encoded = {'dtype': _PLOTLY_DTYPES[array.dtype], 'bdata': base64.b64encode(array.tobytes()).decode()}
+    if array.ndim > 1:
+        encoded['shape'] = ', '.join(str(n) for n in array.shape)
+    return encoded
+
+
+def _round_list(values: list) -> list:
+    """A short numeric list, kept as JSON, rounded like compact_array would."""
+    if all(isinstance(v, int) for v in values):
+        return values
+    rounded = round_to_display(np.asarray(values, dtype=float)).tolist()
+    return [int(v) if v.is_integer() else v for v in rounded]
+
+
+def _compact_value(value: Any) -> Any:
+    array = _as_numeric(value)
+    if array is not None:
+        array = compact_array(array)
+        if array.dtype in _PLOTLY_DTYPES:
+            return encode_typed_array(array)
+    if isinstance(value, (list, tuple)) and value and all(_is_number(v) for v in value):
+        return _round_list(value)
+    if isinstance(value, dict):
+        return {k: _compact_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        # e.g. customdata rows, or trace-like entries of annotations and shapes
+        return [_compact_value(v) for v in value]
+    return value
+
+
+# Layout lists whose entries may carry data arrays
+_LAYOUT_ITEMS = ('annotations', 'shapes')
+
+
+def _prune_template(layout: Dict, trace_types: set) -> Dict:
+    """Drops template trace defaults for trace types the figure does not use; rendering is unchanged."""
+    template = layout.get('template')
+    if not isinstance(template, dict) or 'data' not in template:
+        return layout
+    used = {name: value for name, value in template['data'].items() if name in trace_types}
+    return {**layout, 'template': {**template, 'data': used}}
+
+
+def compact_figure(figure: Dict) -> Dict:
+    """
+    Figure dict with every numeric array (lists, nested lists or typed
+    arrays, at any depth, e.g. x, y, z, marker.size, customdata) rounded to
+    display precision and re-encoded as the narrowest typed array, in the
+    traces and in layout annotations and shapes, and the layout template
+    trimmed to the trace types in use.
+    """
+    data = figure.get('data', [])
+    trace_types = {trace.get('type', 'scatter') for trace in data}
+    layout = _prune_template(figure.get('layout', {}), trace_types)
+    layout = {**layout, **{key: _compact_value(layout[key]) for key in _LAYOUT_ITEMS if key in layout}}
+    return {
+        **figure,
+        'data': [_compact_value(trace) for trace in data],
+        'layout': layout,
+    }
+
+
+def serialize_figure(fig) -> Tuple[bytes, int]:
+    """Compact JSON bytes for a go.Figure, and the size of fig.to_json() for comparison."""
+    full = fig.to_json()
+    return dumps(compact_figure(json.loads(full))), len(full.encode())
@@ -1,43 +1,212 @@
-import plotly.graph_objects as go
-from dash import Output, Input, callback, State
-import plotly.io as pio
-
-def register_export_callbacks():
-    @callback(
-        Output("download-png", "data"),
-        [Input('download-scatter-btn', 'n_clicks'),
-         Input('download-bar-btn', 'n_clicks'),
-         Input('download-radar-btn', 'n_clicks'),
-         Input('download-items-btn', 'n_clicks'),
-         Input('download-ternary-btn', 'n_clicks')],
-        [State('scatter-plot', 'figure'),
-         State('bar-chart', 'figure'),
-         State('radar-chart', 'figure'),
-         State('items-chart', 'figure'),
-         State('ternary-chart', 'figure')],
-        prevent_initial_call=True
-    )
-    def export_graph_as_png(scatter_clicks, bar_clicks, radar_clicks, items_clicks, 
-                           ternary_clicks, scatter_fig, bar_fig, radar_fig, items_fig, ternary_fig):
-        from dash import ctx
-        
-        if not ctx.triggered_id:
-            return None
-        
-        button_id = ctx.triggered_id
-        figure_map = {
-            'download-scatter-btn': (scatter_fig, 'nutrition_scatter.png'),
-            'download-bar-btn': (bar_fig, 'restaurant_rankings.png'),
-            'download-radar-btn': (radar_fig, 'nutrition_radar.png'),
-            'download-items-btn': (items_fig, 'item_rankings.png'),
-            'download-ternary-btn': (ternary_fig, 'macronutrient_ternary.png')
-        }
-        
-        if button_id in figure_map:
-            fig_data, filename = figure_map[button_id]
-            if fig_data:
-                fig = go.Figure(fig_data)
-                img_bytes = pio.to_image(fig, format='png', width=1200, height=800, engine='kaleido')
-                return dict(content=img_bytes, filename=filename, type='image/png', base64=True)
-        
-        return None
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional
+
+from src.cache import LRUCache
+
+# Rendered images kept across exports, bounded by total bytes
+IMAGE_CACHE_BYTES = 64 * 1024 * 1024
+EXPORT_WIDTH = 1200
+EXPORT_HEIGHT = 800
+
+# Graph id -> file name (without extension) used for its exported image
+GRAPH_FILES = {
+    'scatter-plot': 'nutrition_scatter',
+    'bar-chart': 'restaurant_rankings',
+    'radar-chart': 'nutrition_radar',
+    'box-chart': 'calorie_distribution',
+    'items-chart': 'item_rankings',
+    'ternary-chart': 'macronutrient_ternary',
+    'heatmap-chart': 'nutrient_correlation',
+}
+# Download button -> graph id for the per-graph PNG exports
+GRAPH_EXPORTS = {
+    'download-scatter-btn': 'scatter-plot',
+    'download-bar-btn': 'bar-chart',
+    'download-radar-btn': 'radar-chart',
+    'download-items-btn': 'items-chart',
+    'download-ternary-btn': 'ternary-chart',
+}
+# Enough workers to render a full bundle at once, if the CPUs allow
+EXPORT_WORKERS = min(len(GRAPH_FILES), os.cpu_count() or 1)
+
+
+class RenderQueueFull(RuntimeError):
+    """Raised when every renderer is busy and the wait queue is full."""
+
+
+# Per-process renderer state, set up by _start_worker in each pool worker
+_worker: Dict = {}
+
+
+async def _open_browser():
+    import kaleido
+    return await kaleido.Kaleido(n=1).__aenter__()
+
+
+def _start_worker():
+    """Pool initializer: opens one kaleido browser that stays up for the life of the worker."""
+    loop = asyncio.new_event_loop()
+    try:
+        _worker['browser'] = loop.run_until_complete(_open_browser())
+        _worker['loop'] = loop
+    except Exception as error:  # e.g. Chrome not installed; reported by every render
+        _worker['error'] = f"{type(error).__name__}: {error}"
+
+
+def _render(figure_json: str, fmt: str, width: int, height: int) -> bytes:
+    if 'error' in _worker:
+        raise RuntimeError(f"kaleido renderer unavailable ({_worker['error']})")
+    opts = {'format': fmt, 'width': width, 'height': height}
+    return _worker['loop'].run_until_complete(_worker['browser'].calc_fig(json.loads(figure_json), opts=opts))
+
+
+def figure_key(figure: Dict, fmt: str, width: int, height: int) -> str:
+    """Content hash of a figure dict and output options; equal figures give equal keys."""
+    payload = json.dumps([figure, fmt, width, height], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class GraphRenderer:
+    """
+    Static image export through a pool of kaleido worker processes.
+    - Each worker keeps its browser open, so only the first render in a
+      worker pays the kaleido startup cost
+    - At most `workers` renders run at once; up to `max_queued` more wait for
+      a free worker, and further requests raise RenderQueueFull
+    - Images are cached by figure content hash, and identical requests that
+      arrive while a render is running share its result
+    - The pool starts on first use (or start()) and is rebuilt if a worker dies
+    """
+
+    def __init__(self, workers: int = EXPORT_WORKERS, max_queued: int = 8, queue_timeout: float = 30.0):
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self.cache = LRUCache(IMAGE_CACHE_BYTES, len)
+        self._slots = threading.BoundedSemaphore(workers + max_queued)
+        self._lock = threading.RLock()
+        self._pending: Dict[str, Future] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn, not fork: the app process runs server threads, whose
+                # locks a forked worker could inherit mid-use
+                context = multiprocessing.get_context('spawn')
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=context, initializer=_start_worker)
+                # Workers are spawned on demand; one no-op task each brings them all up
+                for _ in range(self.workers):
+                    self._pool.submit(int)
+            return self._pool
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, figure: Dict, fmt: str = 'png', width: int = EXPORT_WIDTH,
+               height: int = EXPORT_HEIGHT) -> Future:
+        """Future with the image bytes of a figure dict (e.g. a dcc.Graph figure)."""
+        key = figure_key(figure, fmt, width, height)
+        cached = self.cache.get(key)
+        if cached is not None:
+            done: Future = Future()
+            done.set_result(cached)
+            return done
+
+        with self._lock:
+            future = self._pending.get(key)
+        if future is not None:
+            return future
+
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise RenderQueueFull(f"all {self.workers} renderers busy and the export queue is full")
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                try:
+                    future = self._submit_render(json.dumps(figure), fmt, width, height)
+                except BaseException:
+                    self._slots.release()
+                    raise
+                self._pending[key] = future
+                future.add_done_callback(lambda f: self._finish(key, f))
+                return future
+        # The same figure was submitted while this request waited for a slot
+        self._slots.release()
+        return future
+
+    def _submit_render(self, figure_json: str, fmt: str, width: int, height: int) -> Future:
+        try:
+            return self.start().submit(_render, figure_json, fmt, width, height)
+        except RuntimeError:
+            # BrokenProcessPool after a worker crash: start a fresh pool once
+            self.shutdown()
+            return self.start().submit(_render, figure_json, fmt, width, height)
+
+    def _finish(self, key: str, future: Future) -> None:
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+        with self._lock:
+            self._pending.pop(key, None)
+        self._slots.release()
+
+    def render(self, figure: Dict, fmt: str = 'png', width: int = EXPORT_WIDTH,
+               height: int = EXPORT_HEIGHT) -> bytes:
+        return self.submit(figure, fmt, width, height).result()
+
+
+def stream_bundle(figures: Dict[str, Dict], fmt: str, manifest: Dict,
+                  renderer: Optional[GraphRenderer] = None) -> Iterator[bytes]:
+    """
+    ZIP archive with one image per figure (keyed by graph id) and a
+    manifest.json of `manifest` plus the format, size and file list, as
+    chunks of bytes.
+    - Every figure is submitted before this returns, so they render in
+      parallel across the pool and RenderQueueFull is raised up front
+    - Each image is written to the archive, and its bytes handed out, as
+      soon as it finishes rendering; no complete archive is held in memory
+    """
+    renderer = renderer or graph_renderer
+    futures = {renderer.submit(figure, fmt): graph_id for graph_id, figure in figures.items()}
+    return _zip_renders(futures, fmt, manifest)
+
+
+def _zip_renders(futures: Dict[Future, str], fmt: str, manifest: Dict) -> Iterator[bytes]:
+    # Imported here so render workers, which import this module, skip pandas and pyarrow
+    from src.data_exports import Drain
+    # PNG is already compressed; SVG text deflates well
+    compression = zipfile.ZIP_DEFLATED if fmt == 'svg' else zipfile.ZIP_STORED
+    sink = Drain()
+    files = []
+    with zipfile.ZipFile(sink, 'w') as archive:
+        for future in as_completed(futures):
+            graph_id = futures[future]
+            name = f"{GRAPH_FILES.get(graph_id, graph_id)}.{fmt}"
+            image = future.result()
+            archive.writestr(name, image, compress_type=compression)
+            files.append({'graph': graph_id, 'file': name, 'bytes': len(image)})
+            yield sink.take()
+        archive.writestr('manifest.json', json.dumps({
+            **manifest,
+            'format': fmt,
+            'width': EXPORT_WIDTH,
+            'height': EXPORT_HEIGHT,
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'files': files,
+        }, indent=2), compress_type=zipfile.ZIP_DEFLATED)
+    yield sink.take()
+
+
+graph_renderer = GraphRenderer()
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from src.analyzer import (
+    NUTRIENT_KEYS,
+    AnalysisResult,
+    FoodRecord,
+    combine_shifted_fits,
+    quartic_extrema_batched,
+    record_arrays,
+    restaurant_power_sums,
+    score_restaurants,
+    solve_power_sums,
+)
+from src.columnar import FoodColumns, ItemScoreList
+
+
+@dataclass
+class _RestaurantStats:
+    count: int = 0
+    s_x_pow: np.ndarray = field(default_factory=lambda: np.zeros(9))
+    s_xy_pow: np.ndarray = field(default_factory=lambda: np.zeros((len(NUTRIENT_KEYS), 5)))
+    # Multiset of the positive calorie values, for the fit interval [min, max]
+    calories: Counter = field(default_factory=Counter)
+    final_coeffs: np.ndarray = field(default_factory=lambda: np.zeros(5))
+
+
+def _calorie_counts(codes: np.ndarray, calories: np.ndarray) -> Dict[int, Counter]:
+    """Multiset of positive calorie values per restaurant code, counted with NumPy."""
+    positive = calories > 0
+    pairs, counts = np.unique(
+        np.stack([codes[positive].astype(float), calories[positive]]), axis=1, return_counts=True
+    )
+    result: Dict[int, Counter] = {}
+    for code, x, n in zip(pairs[0].astype(int).tolist(), pairs[1].tolist(), counts.tolist()):
+        result.setdefault(code, Counter())[x] = n
+    return result
+
+
+class IncrementalAnalyzer:
+    """
+    analyze_fast_food_data over a changing set of records.
+    - Keeps the power sums behind every (restaurant, nutrient) fit
+      (sum x^0..x^8 and sum x^k * y), item counts and the positive calorie
+      values, never the records themselves
+    - add_records / remove_records update those from the changed rows
+      and refit only the restaurants they touch
+    - result(columns) scores a store holding the current records with the
+      cached fits, the same AnalysisResult as analyze_columns with the
+      analytic extrema (sampled_extrema=False)
+    """
+
+    def __init__(self, records: Iterable[FoodRecord] = ()):
+        self._stats: Dict[str, _RestaurantStats] = {}
+        self.add_records(records)
+
+    @classmethod
+    def from_columns(cls, columns: FoodColumns) -> "IncrementalAnalyzer":
+        """Analyzer over every row of a columnar store, built from its arrays."""
+        analyzer = cls()
+        analyzer._add(columns.restaurants, columns.restaurant_codes,
+                      columns.values['calories'], columns.nutrients())
+        return analyzer
+
+    def add_records(self, records: Iterable[FoodRecord]) -> Set[str]:
+        """Adds records and refits their restaurants. Returns the affected restaurant names."""
+        records = list(records)
+        if not records:
+            return set()
+        return self._add(*record_arrays(records))
+
+    def _add(self, names: List[str], codes: np.ndarray, calories: np.ndarray,
+             nutrients: List[np.ndarray]) -> Set[str]:
+        s_x_pow, s_xy_pow = restaurant_power_sums(codes, calories, nutrients, len(names))
+        counts = np.bincount(codes, minlength=len(names))
+        positive = _calorie_counts(codes, calories)
+
+        affected: Set[str] = set()
+        for code, name in enumerate(names):
+            if counts[code] == 0:
+                continue
+            stats = self._stats.setdefault(name, _RestaurantStats())
+            stats.count += int(counts[code])
+            stats.s_x_pow += s_x_pow[code]
+            stats.s_xy_pow += s_xy_pow[code]
+            stats.calories.update(positive.get(code, Counter()))
+            affected.add(name)
+
+        self._refit(affected)
+        return affected
+
+    def remove_records(self, records: Iterable[FoodRecord]) -> Set[str]:
+        """
+        Removes records and refits their restaurants.
+        Raises ValueError, without changing anything, if a restaurant has
+        fewer items (or fewer items at some calorie value) than are removed.
+        Matching the records themselves is up to the caller's store.
+        """
+        records = list(records)
+        if not records:
+            return set()
+
+        names, codes, calories, nutrients = record_arrays(records)
+        counts = np.bincount(codes, minlength=len(names))
+        removed_calories = _calorie_counts(codes, calories)
+        for code, name in enumerate(names):
+            stats = self._stats.get(name)
+            wanted = removed_calories.get(code, Counter())
+            if stats is None or stats.count < counts[code] or +(wanted - stats.calories):
+                raise ValueError(f"Cannot remove records not present for {name!r}")
+
+        s_x_pow, s_xy_pow = restaurant_power_sums(codes, calories, nutrients, len(names))
+        for code, name in enumerate(names):
+            stats = self._stats[name]
+            stats.count -= int(counts[code])
+            stats.s_x_pow -= s_x_pow[code]
+            stats.s_xy_pow -= s_xy_pow[code]
+            stats.calories -= removed_calories.get(code, Counter())
+
+            if stats.count == 0:
+                del self._stats[name]
+            elif not stats.calories:
+                # Drop rounding residue once no item contributes to the fit
+                stats.s_x_pow[:] = 0.0
+                stats.s_xy_pow[:] = 0.0
+
+        affected = set(names)
+        self._refit(affected)
+        return affected
+
+    def result(self, columns: FoodColumns) -> Optional[AnalysisResult]:
+        """
+        AnalysisResult for a store holding exactly the current records.
+        Items are scored in one vectorized pass with the cached finalCoeffs
+        and kept as ItemScoreList row views of columns, so this is O(n)
+        over the store even when only one restaurant changed.
+        """
+        final_coeffs = np.zeros((len(columns.restaurants), 5))
+        for code, name in enumerate(columns.restaurants):
+            stats = self._stats.get(name)
+            if stats is not None:
+                final_coeffs[code] = stats.final_coeffs
+
+        def make_items(rows: np.ndarray, raw: np.ndarray, penalized: np.ndarray) -> ItemScoreList:
+            return ItemScoreList(columns, rows, raw, penalized)
+
+        return score_restaurants(columns.restaurants, columns.restaurant_codes,
+                                 columns.values['calories'], final_coeffs, make_items)
+
+    def _refit(self, restaurants: Set[str]) -> None:
+        stats = [self._stats[name] for name in self._stats if name in restaurants]
+        if not stats:
+            return
+
+        final_coeffs = np.zeros((len(stats), 5))
+        fitted = np.array([bool(s.calories) for s in stats])
+
+        if fitted.any():
+            coeffs = solve_power_sums(
+                np.array([s.s_x_pow for s, f in zip(stats, fitted) if f]),
+                np.array([s.s_xy_pow for s, f in zip(stats, fitted) if f]),
+            )
+            lo = np.array([min(s.calories) for s, f in zip(stats, fitted) if f])
+            hi = np.array([max(s.calories) for s, f in zip(stats, fitted) if f])
+            min_y, max_y = quartic_extrema_batched(coeffs, lo[:, None], hi[:, None])
+            final_coeffs[fitted] = combine_shifted_fits(coeffs, min_y, max_y)
+
+        for s, coeffs in zip(stats, final_coeffs):
+            s.final_coeffs = coeffs
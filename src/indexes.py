@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from src.columnar import FoodColumns
+
+# Row selection: a slice when the rows are contiguous, else sorted row positions
+RowSelection = Union[slice, np.ndarray]
+
+
+class RestaurantCalorieIndex:
+    """
+    Row index over a store sorted by FoodColumns.sorted_by_restaurant.
+    - Each restaurant owns the contiguous rows offsets[code]:offsets[code + 1]
+    - Within that run calories ascend, so a (restaurant, calorie range) query
+      is two searchsorted calls and selects a slice, with no copying
+    - Calorie-only queries go through a calories-wide sort order that is
+      built once, on first use, however many threads ask for it at once
+    """
+
+    def __init__(self, columns: FoodColumns):
+        codes = columns.restaurant_codes
+        if len(codes) > 1 and np.any(codes[1:] < codes[:-1]):
+            raise ValueError("RestaurantCalorieIndex needs columns from sorted_by_restaurant()")
+
+        self.restaurants = columns.restaurants
+        self._code_of = {name: code for code, name in enumerate(self.restaurants)}
+        self.calories = columns.values['calories']
+        self.offsets = np.searchsorted(codes, np.arange(len(self.restaurants) + 1))
+        self._calorie_bounds = (self.calories.min(), self.calories.max()) if len(codes) else (0.0, 0.0)
+        # (row order by calories, calories in that order); one tuple, so readers see both or neither
+        self._calorie_order: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._calorie_order_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.calories)
+
+    def restaurant_rows(self, restaurant: str) -> slice:
+        """All rows of one restaurant; empty for an unknown name."""
+        code = self._code_of.get(restaurant)
+        if code is None:
+            return slice(0, 0)
+        return slice(int(self.offsets[code]), int(self.offsets[code + 1]))
+
+    def rows(
+        self,
+        restaurant: Optional[str] = None,
+        calorie_range: Optional[Tuple[float, float]] = None,
+    ) -> RowSelection:
+        """
+        Rows with the given restaurant (None for all) and calories inside the
+        inclusive calorie_range (None for any).
+        """
+        if restaurant is not None:
+            rows = self.restaurant_rows(restaurant)
+            if calorie_range is None:
+                return rows
+            calories = self.calories[rows]
+            lo, hi = calorie_range
+            return slice(
+                rows.start + int(np.searchsorted(calories, lo, 'left')),
+                rows.start + int(np.searchsorted(calories, hi, 'right')),
+            )
+
+        if calorie_range is None:
+            return slice(0, len(self))
+        lo, hi = calorie_range
+        if lo <= self._calorie_bounds[0] and hi >= self._calorie_bounds[1]:
+            return slice(0, len(self))
+
+        by_calories, sorted_calories = self._sorted_by_calories()
+        start = np.searchsorted(sorted_calories, lo, 'left')
+        stop = np.searchsorted(sorted_calories, hi, 'right')
+        # Back to restaurant-then-calories order, matching the slice queries
+        return np.sort(by_calories[start:stop])
+
+    def _sorted_by_calories(self) -> Tuple[np.ndarray, np.ndarray]:
+        order = self._calorie_order
+        if order is None:
+            with self._calorie_order_lock:
+                order = self._calorie_order
+                if order is None:
+                    by_calories = np.argsort(self.calories, kind='stable')
+                    sorted_calories = self.calories[by_calories]
+                    by_calories.flags.writeable = sorted_calories.flags.writeable = False
+                    order = self._calorie_order = (by_calories, sorted_calories)
+        return order
+
+    def calorie_boxes(
+        self,
+        restaurant: Optional[str] = None,
+        calorie_range: Optional[Tuple[float, float]] = None,
+        max_outliers: int = 50,
+    ) -> List[Dict]:
+        """
+        box_summary of calories per restaurant (one restaurant, or all) with
+        items in the selection. Each restaurant's calories are already a sorted
+        slice, so no sorting happens here.
+        """
+        names = self.restaurants if restaurant is None else [restaurant]
+        boxes = []
+        for name in names:
+            values = self.calories[self.rows(name, calorie_range)]
+            if len(values):
+                boxes.append({'restaurant': name, **box_summary(values, max_outliers)})
+        return boxes
+
+
+def _hazen_quantile(values: np.ndarray, p: float) -> float:
+    """Quantile of sorted values the way plotly.js box traces interpolate ("linear" quartilemethod)."""
+    h = min(max(len(values) * p - 0.5, 0.0), len(values) - 1.0)
+    lo = int(h)
+    hi = min(lo + 1, len(values) - 1)
+    return float(values[lo] + (h - lo) * (values[hi] - values[lo]))
+
+
+def box_summary(values: np.ndarray, max_outliers: int) -> Dict:
+    """
+    Box-plot statistics of non-empty sorted values, matching plotly.js.
+    - Whiskers end at the most extreme values within 1.5 IQR of the box
+    - Outliers beyond the whiskers are thinned to at most max_outliers evenly
+      spaced values, always keeping the extremes; outlier_count is the full count
+    """
+    q1, median, q3 = (_hazen_quantile(values, p) for p in (0.25, 0.5, 0.75))
+    iqr = q3 - q1
+    low = int(np.searchsorted(values, q1 - 1.5 * iqr, 'left'))
+    high = int(np.searchsorted(values, q3 + 1.5 * iqr, 'right'))
+    outliers = np.concatenate([values[:low], values[high:]])
+    if len(outliers) > max_outliers:
+        keep = np.unique(np.linspace(0, len(outliers) - 1, max_outliers).round().astype(np.intp))
+        outliers_shown = outliers[keep]
+    else:
+        outliers_shown = outliers
+    return {
+        'count': len(values),
+        'q1': q1,
+        'median': median,
+        'q3': q3,
+        'lowerfence': min(q1, float(values[low])) if low < len(values) else q1,
+        'upperfence': max(q3, float(values[high - 1])) if high > 0 else q3,
+        'outliers': outliers_shown,
+        'outlier_count': len(outliers),
+    }
+
+
+def _first_in_range(rows: np.ndarray, calories: np.ndarray, lo: float, hi: float, k: int) -> np.ndarray:
+    """First k entries of rows whose calories (aligned with rows) are within [lo, hi]."""
+    found = []
+    count, start, window = 0, 0, max(4 * k, 64)
+    while start < len(rows) and count < k:
+        chunk = calories[start:start + window]
+        hits = rows[start:start + window][(chunk >= lo) & (chunk <= hi)]
+        found.append(hits)
+        count += len(hits)
+        start += window
+        window *= 2
+    return np.concatenate(found)[:k] if found else rows[:0]
+
+
+class TopItemsIndex:
+    """
+    Items pre-ranked by each nutrient, for "top k within a calorie range" queries.
+    - nutrients maps each indexed nutrient to True when lower values rank first
+    - Per nutrient there is one ranking over all rows and one grouped by
+      restaurant, each with the calories attached in ranked order
+    - A query walks the ranking in growing windows until k items in range are
+      found, so it only touches the leading candidates, not every row
+    - Ties keep store order, like DataFrame.nsmallest / nlargest; NaN values are skipped
+    """
+
+    def __init__(self, columns: FoodColumns, nutrients: Dict[str, bool]):
+        self.restaurants = columns.restaurants
+        self._code_of = {name: code for code, name in enumerate(self.restaurants)}
+        self.ascending = dict(nutrients)
+        codes = columns.restaurant_codes
+        calories = columns.values['calories']
+        bounds = np.arange(len(self.restaurants) + 1)
+
+        self._overall: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._grouped: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for name, ascending in self.ascending.items():
+            values = columns.values[name]
+            keys = values if ascending else -values
+            valid = np.flatnonzero(~np.isnan(values))
+
+            rows = valid[np.argsort(keys[valid], kind='stable')]
+            self._overall[name] = (rows, calories[rows])
+
+            rows = valid[np.lexsort((keys[valid], codes[valid]))]
+            offsets = np.searchsorted(codes[rows], bounds)
+            self._grouped[name] = (rows, calories[rows], offsets)
+
+    def __contains__(self, nutrient: str) -> bool:
+        return nutrient in self.ascending
+
+    def top(
+        self,
+        nutrient: str,
+        k: int,
+        restaurant: Optional[str] = None,
+        calorie_range: Optional[Tuple[float, float]] = None,
+    ) -> np.ndarray:
+        """Row positions of the k best items by nutrient, best first."""
+        lo, hi = calorie_range if calorie_range is not None else (-np.inf, np.inf)
+        if restaurant is None:
+            rows, calories = self._overall[nutrient]
+        else:
+            code = self._code_of.get(restaurant)
+            if code is None:
+                return np.empty(0, dtype=np.intp)
+            rows, calories, offsets = self._grouped[nutrient]
+            run = slice(offsets[code], offsets[code + 1])
+            rows, calories = rows[run], calories[run]
+        return _first_in_range(rows, calories, lo, hi, k)
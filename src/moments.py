@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.analyzer import (
+    NUTRIENT_KEYS,
+    PENALTY_CALORIES,
+    FoodRecord,
+    combine_shifted_fits,
+    quartic_extrema_batched,
+    record_arrays,
+    restaurant_power_sums,
+    score_items_batched,
+    solve_power_sums,
+)
+
+if TYPE_CHECKING:
+    from src.columnar import FoodColumns
+
+# Matches the step of the dashboard calorie slider
+CALORIE_BUCKET_WIDTH = 50.0
+
+
+class CalorieBuckets:
+    """
+    Fixed-width calorie bands shared by the bucketed indexes.
+    - Bucket k holds calories in [k * width, (k + 1) * width); negative values land in bucket 0
+    - Items exactly on a bucket's lower edge are flagged in on_edge, so an
+      inclusive range [lo, hi] on bucket edges is buckets [lo, hi) plus the
+      edge items of hi's bucket
+    """
+
+    def __init__(self, calories: np.ndarray, width: float = CALORIE_BUCKET_WIDTH):
+        self.width = float(width)
+        scaled = np.maximum(calories, 0.0) / self.width
+        self.codes = np.floor(scaled).astype(np.intp)
+        self.on_edge = (calories >= 0) & (scaled == self.codes)
+        self.count = int(self.codes.max()) + 1 if len(calories) else 1
+
+    def span(self, lo: float, hi: float) -> Tuple[int, int, Optional[int]]:
+        """
+        Buckets covering the inclusive calorie range [lo, hi].
+        Returns (start, stop, edge): sum buckets[start:stop], plus the edge
+        items of bucket `edge` when it is not None. Bounds that are not on a
+        bucket edge are widened to the enclosing edges.
+        """
+        if hi < lo:
+            return 0, 0, None
+        top = self.count * self.width
+        start = int(math.floor(min(max(lo, 0.0), top) / self.width))
+        stop = int(math.ceil(min(max(hi, 0.0), top) / self.width))
+        return start, stop, stop if stop < self.count else None
+
+    def total(self, cells: np.ndarray, edge_cells: np.ndarray, span: Tuple[int, int, Optional[int]]) -> np.ndarray:
+        """Sums per-bucket aggregates of shape (rows, buckets, ...) over a span."""
+        start, stop, edge = span
+        out = cells[:, start:stop].sum(axis=1)
+        if edge is not None:
+            out = out + edge_cells[:, edge]
+        return out
+
+
+class CalorieMomentIndex:
+    """
+    Power-sum moments of every (restaurant, nutrient) fit, bucketed by calories.
+    Restaurant scores for any calorie range are re-fit from summed bucket
+    moments, so a query costs O(restaurants * buckets) instead of O(items).
+    Items above PENALTY_CALORIES are scored one by one because their penalty
+    is not polynomial; they are kept in a small per-restaurant sorted list.
+    """
+
+    def __init__(
+        self,
+        restaurants: List[str],
+        codes: np.ndarray,
+        calories: np.ndarray,
+        nutrients: List[np.ndarray],
+        width: float = CALORIE_BUCKET_WIDTH,
+    ):
+        self.restaurants = list(restaurants)
+        self._row_of = {name: row for row, name in enumerate(self.restaurants)}
+        self.buckets = CalorieBuckets(calories, width)
+
+        n_rows, n_buckets = len(self.restaurants), self.buckets.count
+        n_cells = n_rows * n_buckets
+        cells = np.asarray(codes, dtype=np.intp) * n_buckets + self.buckets.codes
+        edge = self.buckets.on_edge
+
+        def per_cell(mask: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+            w = None if weights is None else weights[mask]
+            return np.bincount(cells[mask], weights=w, minlength=n_cells).reshape(n_rows, n_buckets)
+
+        everything = np.ones(len(calories), dtype=bool)
+        self._counts = per_cell(everything)
+        self._edge_counts = per_cell(edge)
+
+        # Fit moments, over items with calories > 0 like the full analysis
+        s_x_pow, s_xy_pow = restaurant_power_sums(cells, calories, nutrients, n_cells)
+        self._s_x_pow = s_x_pow.reshape(n_rows, n_buckets, 9)
+        self._s_xy_pow = s_xy_pow.reshape(n_rows, n_buckets, len(NUTRIENT_KEYS), 5)
+        s_x_pow, s_xy_pow = restaurant_power_sums(
+            cells[edge], calories[edge], [values[edge] for values in nutrients], n_cells
+        )
+        self._edge_s_x_pow = s_x_pow.reshape(n_rows, n_buckets, 9)
+        self._edge_s_xy_pow = s_xy_pow.reshape(n_rows, n_buckets, len(NUTRIENT_KEYS), 5)
+
+        # Score moments sum(x^0..x^4) over items whose penalty factor is 1
+        free = calories <= PENALTY_CALORIES
+        x_pow = np.ones(len(calories))
+        score_pow, edge_score_pow = [], []
+        for _ in range(5):
+            score_pow.append(per_cell(free, x_pow))
+            edge_score_pow.append(per_cell(free & edge, x_pow))
+            x_pow = x_pow * calories
+        self._score_pow = np.stack(score_pow, axis=-1)
+        self._edge_score_pow = np.stack(edge_score_pow, axis=-1)
+
+        # Fit interval bounds per bucket
+        positive = calories > 0
+        self._lo = np.full(n_cells, np.inf)
+        self._hi = np.full(n_cells, -np.inf)
+        np.minimum.at(self._lo, cells[positive], calories[positive])
+        np.maximum.at(self._hi, cells[positive], calories[positive])
+        self._lo = self._lo.reshape(n_rows, n_buckets)
+        self._hi = self._hi.reshape(n_rows, n_buckets)
+        edge_values = np.arange(n_buckets) * self.buckets.width
+        has_edge = (self._edge_counts > 0) & (edge_values > 0)
+        self._edge_lo = np.where(has_edge, edge_values, np.inf)
+        self._edge_hi = np.where(has_edge, edge_values, -np.inf)
+
+        # Penalized tail, sorted by (restaurant, calories)
+        tail = calories > PENALTY_CALORIES
+        order = np.lexsort((calories[tail], codes[tail]))
+        self._tail_codes = codes[tail][order]
+        self._tail_calories = calories[tail][order]
+        self._tail_offsets = np.searchsorted(self._tail_codes, np.arange(n_rows + 1))
+
+    @classmethod
+    def from_records(cls, records: List[FoodRecord], width: float = CALORIE_BUCKET_WIDTH) -> "CalorieMomentIndex":
+        restaurants, codes, calories, nutrients = record_arrays(records)
+        return cls(restaurants, codes, calories, nutrients, width)
+
+    @classmethod
+    def from_columns(cls, columns: "FoodColumns", width: float = CALORIE_BUCKET_WIDTH) -> "CalorieMomentIndex":
+        return cls(
+            columns.restaurants,
+            columns.restaurant_codes,
+            columns.values['calories'],
+            columns.nutrients(),
+            width,
+        )
+
+    def restaurant_scores(self, calorie_range: Tuple[float, float], restaurant: Optional[str] = None) -> List[Dict]:
+        """
+        Re-fits and re-scores restaurants on the items inside calorie_range.
+        Returns the same dicts as DataService.get_restaurant_scores, best first,
+        for restaurants with at least one item in range.
+        """
+        if restaurant is None:
+            rows = np.arange(len(self.restaurants))
+        elif restaurant in self._row_of:
+            rows = np.array([self._row_of[restaurant]])
+        else:
+            return []
+
+        span = self.buckets.span(*calorie_range)
+        total = self.buckets.total
+
+        counts = total(self._counts[rows], self._edge_counts[rows], span)
+        s_x_pow = total(self._s_x_pow[rows], self._edge_s_x_pow[rows], span)
+        s_xy_pow = total(self._s_xy_pow[rows], self._edge_s_xy_pow[rows], span)
+        score_pow = total(self._score_pow[rows], self._edge_score_pow[rows], span)
+
+        start, stop, edge = span
+        lo = self._lo[rows, start:stop].min(axis=1, initial=np.inf)
+        hi = self._hi[rows, start:stop].max(axis=1, initial=-np.inf)
+        if edge is not None:
+            lo = np.minimum(lo, self._edge_lo[rows, edge])
+            hi = np.maximum(hi, self._edge_hi[rows, edge])
+
+        final_coeffs = np.zeros((len(rows), 5))
+        fitted = s_x_pow[:, 0] > 0
+        if fitted.any():
+            coeffs = solve_power_sums(s_x_pow[fitted], s_xy_pow[fitted])
+            min_y, max_y = quartic_extrema_batched(coeffs, lo[fitted, None], hi[fitted, None])
+            final_coeffs[fitted] = combine_shifted_fits(coeffs, min_y, max_y)
+
+        # sum over items of a0 + a1*x + ... + a4*x^4 for the penalty-free items
+        scores = (final_coeffs * score_pow).sum(axis=1)
+
+        cal_lo, cal_hi = start * self.buckets.width, stop * self.buckets.width
+        for i, row in enumerate(rows):
+            begin, end = self._tail_offsets[row], self._tail_offsets[row + 1]
+            if begin == end:
+                continue
+            tail = self._tail_calories[begin:end]
+            tail = tail[np.searchsorted(tail, cal_lo, "left"):np.searchsorted(tail, cal_hi, "right")]
+            if len(tail):
+                _, penalized = score_items_batched(final_coeffs[i], tail)
+                scores[i] += penalized.sum()
+
+        results = [
+            {
+                'restaurant': self.restaurants[row],
+                'score': float(score),
+                'item_count': int(count),
+                'coefficients': tuple(float(c) for c in coeffs),
+            }
+            for row, count, score, coeffs in zip(rows, counts, scores, final_coeffs)
+            if count > 0
+        ]
+        results.sort(key=lambda r: r['score'], reverse=True)
+        return results
+
+
+# Columns aggregated for the comparison radar and the correlation heatmap
+CUBE_FIELDS: List[str] = ['calories', 'sodium', 'saturated_fat', 'protein', 'fiber', 'sugars']
+
+
+class CalorieAggregateCube:
+    """
+    Count, sum and cross-product sums of CUBE_FIELDS per (restaurant, calorie bucket).
+    Means and correlations for any restaurant / calorie-range selection are
+    combined from bucket totals, so their cost does not depend on item count.
+    Values are centered on their overall mean before accumulating, which keeps
+    the covariance arithmetic well conditioned.
+    """
+
+    def __init__(
+        self,
+        restaurants: List[str],
+        codes: np.ndarray,
+        values: Dict[str, np.ndarray],
+        fields: Optional[List[str]] = None,
+        width: float = CALORIE_BUCKET_WIDTH,
+    ):
+        self.restaurants = list(restaurants)
+        self.fields = list(fields or CUBE_FIELDS)
+        self._row_of = {name: row for row, name in enumerate(self.restaurants)}
+        self.buckets = CalorieBuckets(values['calories'], width)
+
+        n_rows, n_buckets, n_fields = len(self.restaurants), self.buckets.count, len(self.fields)
+        n_cells = n_rows * n_buckets
+        cells = np.asarray(codes, dtype=np.intp) * n_buckets + self.buckets.codes
+        edge = self.buckets.on_edge
+        columns = [values[name] for name in self.fields]
+        self.center = np.array([column.mean() if len(column) else 0.0 for column in columns])
+        centered = [column - c for column, c in zip(columns, self.center)]
+
+        def per_cell(weights: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+            cell = np.bincount(cells, weights=weights, minlength=n_cells)
+            edge_cell = np.bincount(cells[edge], weights=None if weights is None else weights[edge], minlength=n_cells)
+            return cell.reshape(n_rows, n_buckets), edge_cell.reshape(n_rows, n_buckets)
+
+        self._counts, self._edge_counts = per_cell(None)
+        self._sums = np.zeros((n_rows, n_buckets, n_fields))
+        self._edge_sums = np.zeros((n_rows, n_buckets, n_fields))
+        self._cross = np.zeros((n_rows, n_buckets, n_fields, n_fields))
+        self._edge_cross = np.zeros((n_rows, n_buckets, n_fields, n_fields))
+        for i in range(n_fields):
+            self._sums[..., i], self._edge_sums[..., i] = per_cell(centered[i])
+            for j in range(i, n_fields):
+                cross, edge_cross = per_cell(centered[i] * centered[j])
+                self._cross[..., i, j] = self._cross[..., j, i] = cross
+                self._edge_cross[..., i, j] = self._edge_cross[..., j, i] = edge_cross
+
+    @classmethod
+    def from_columns(cls, columns: "FoodColumns", fields: Optional[List[str]] = None,
+                     width: float = CALORIE_BUCKET_WIDTH) -> "CalorieAggregateCube":
+        return cls(columns.restaurants, columns.restaurant_codes, columns.values, fields, width)
+
+    def _rows(self, restaurant: Optional[str]) -> np.ndarray:
+        if restaurant is None:
+            return np.arange(len(self.restaurants))
+        if restaurant in self._row_of:
+            return np.array([self._row_of[restaurant]])
+        return np.empty(0, dtype=np.intp)
+
+    def totals(self, restaurant: Optional[str] = None,
+               calorie_range: Optional[Tuple[float, float]] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Per-restaurant (rows, counts, centered sums, centered cross-products)
+        over the inclusive calorie_range (None for all calories).
+        """
+        rows = self._rows(restaurant)
+        span = self.buckets.span(*(calorie_range or (-np.inf, np.inf)))
+        total = self.buckets.total
+        return (
+            rows,
+            total(self._counts[rows], self._edge_counts[rows], span),
+            total(self._sums[rows], self._edge_sums[rows], span),
+            total(self._cross[rows], self._edge_cross[rows], span),
+        )
+
+    def restaurant_means(self, restaurant: Optional[str] = None,
+                         calorie_range: Optional[Tuple[float, float]] = None) -> Tuple[List[str], np.ndarray]:
+        """Names and (restaurants, fields) means for restaurants with items in the selection."""
+        rows, counts, sums, _ = self.totals(restaurant, calorie_range)
+        present = counts > 0
+        means = sums[present] / counts[present, None] + self.center
+        return [self.restaurants[row] for row in rows[present]], means
+
+    def correlation(self, restaurant: Optional[str] = None,
+                    calorie_range: Optional[Tuple[float, float]] = None) -> np.ndarray:
+        """Pearson correlation of the fields over all selected items; NaN where undefined."""
+        _, counts, sums, cross = self.totals(restaurant, calorie_range)
+        n = counts.sum()
+        if n < 2:
+            return np.full((len(self.fields), len(self.fields)), np.nan)
+        s = sums.sum(axis=0)
+        squares = cross.sum(axis=0)
+        scatter = squares - np.outer(s, s) / n
+        # A constant column leaves only rounding residue in its scatter
+        constant = np.diag(scatter) <= 1e-10 * np.diag(squares)
+        std = np.sqrt(np.clip(np.diag(scatter), 0.0, None))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = scatter / np.outer(std, std)
+        np.fill_diagonal(corr, 1.0)
+        corr[constant[:, None] | constant[None, :]] = np.nan
+        return np.clip(corr, -1.0, 1.0)
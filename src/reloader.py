@@ -0,0 +1,55 @@
+import os
+import threading
+import traceback
+from pathlib import Path
+from typing import Callable, Optional, Tuple, Union
+
+
+class FileWatcher:
+    """
+    Polls a file's size and modification time on a daemon thread.
+    - on_change runs on the watcher thread once a change has held still for
+      one more interval, so a file that is still being written is not read
+    - A missing file (e.g. mid-replace) is not a change
+    - Errors from on_change are printed and the watcher keeps going
+    """
+
+    def __init__(self, path: Union[str, Path], on_change: Callable[[], object], interval: float = 2.0):
+        self.path = Path(path)
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def start(self) -> "FileWatcher":
+        self._thread = threading.Thread(target=self._run, name=f"watch {self.path.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        seen = self._stat()
+        pending = None
+        while not self._stop.wait(self.interval):
+            current = self._stat()
+            if current is None or current == seen:
+                pending = None
+            elif current != pending:
+                pending = current
+            else:
+                seen, pending = current, None
+                try:
+                    self.on_change()
+                except Exception:
+                    traceback.print_exc()
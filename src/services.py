@@ -1,21 +1,197 @@
-from functools import lru_cache
+import multiprocessing
+import threading
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
+import numpy as np
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Sequence, Tuple, TypeVar
 from src.analyzer import (
-    FoodRecord, AnalysisResult, parse_fast_food_csv,
-    analyze_fast_food_data, QuarticCoefficients, evaluate_quartic
+    FoodRecord, AnalysisResult, QuarticCoefficients, evaluate_quartic, record_key, score_items_batched
 )
+from src.cache import LRUCache
+from src.columnar import FoodColumns, FoodRow, ItemScoreList, analyze_columns, read_fast_food_columns
+from src.incremental import IncrementalAnalyzer
+from src.indexes import RestaurantCalorieIndex, TopItemsIndex
+from src.moments import CalorieAggregateCube, CalorieMomentIndex
+from src.reloader import FileWatcher
+from src.snapshot import cached_snapshot_key, load_snapshot, save_snapshot, snapshot_lock
 
 DATA_DIR = Path(__file__).parent.parent / "data"
 CSV_PATH = DATA_DIR / "fastfood.csv"
+SNAPSHOT_DIR = DATA_DIR / ".snapshots"
+
+# Memory budget for filtered DataFrames reused across tab and nutrient changes
+FILTER_CACHE_BYTES = 64 * 1024 * 1024
+
+
+# Outliers drawn per restaurant in the calorie box plot; the rest are thinned out
+BOX_MAX_OUTLIERS = 50
+
+# Nutrients ranked by the Top Items tab -> True when lower values rank first
+TOP_ITEM_NUTRIENTS = {
+    'protein': False,
+    'sodium': True,
+    'saturated_fat': True,
+    'sugars': True,
+    'fiber': False,
+}
+
+
+T = TypeVar("T")
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=False).sum())
+
+
+def parse_csv(csv_path: Path) -> Tuple[FoodColumns, Optional[AnalysisResult]]:
+    columns = read_fast_food_columns(csv_path).sorted_by_restaurant()
+    return columns, analyze_columns(columns)
+
+
+def publish_snapshot(csv_path: Path, directory: Path, key: str) -> Tuple[FoodColumns, Optional[AnalysisResult]]:
+    """
+    The snapshot for key, parsing csv_path and saving it first if needed.
+    - Under snapshot_lock, so when several server workers start together
+      only one parses; the others wait and map its snapshot
+    - The builder maps the saved snapshot too, so every process shares
+      the same read-only pages instead of keeping a private copy
+    """
+    built = None
+    try:
+        with snapshot_lock(directory):
+            snapshot = load_snapshot(directory, key)
+            if snapshot is not None:
+                return snapshot
+            built = parse_csv(csv_path)
+            save_snapshot(directory, key, *built)
+            return load_snapshot(directory, key) or built
+    except OSError:
+        # A read-only data directory only costs the warm start
+        return built or parse_csv(csv_path)
+
+
+def _publish_snapshot_process(csv_path: str, directory: str, key: str) -> None:
+    """publish_snapshot for a child process; the parent maps the result itself."""
+    publish_snapshot(Path(csv_path), Path(directory), key)
+
+
+class Dataset:
+    """
+    One version of the data: the columnar store, its analysis and the indexes
+    derived from them.
+    - Never modified once published; a new version is a new Dataset, so a
+      callback holding one never sees a mix of old and new data
+    - Column and score arrays are read-only and df shares them, so an
+      in-place write raises instead of changing data other threads are
+      reading; callers derive new frames (column selection, assign) rather
+      than taking defensive copies
+    - The row index and DataFrame are built up front, the other indexes on
+      first use (or ahead of publishing, by warm()); each is built once,
+      however many threads ask for it at the same time
+    - source_key is the snapshot key of the CSV it was read from, None after
+      update_records
+    """
+
+    def __init__(self, columns: FoodColumns, analysis: Optional[AnalysisResult],
+                 version: int, source_key: Optional[str] = None):
+        self.columns = columns.read_only()
+        self.analysis = analysis
+        self.version = version
+        self.source_key = source_key
+        # The row index relies on columns being sorted_by_restaurant()
+        self.index = RestaurantCalorieIndex(columns)
+        self.df = columns.to_frame()
+        self._moments: Optional[CalorieMomentIndex] = None
+        self._cube: Optional[CalorieAggregateCube] = None
+        self._top_items: Optional[TopItemsIndex] = None
+        self._item_scores: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._build_lock = threading.Lock()
+    
+    def _lazy(self, name: str, build: Callable[[], T]) -> T:
+        """Attribute `name`, built by `build` under the lock on first use; later reads take no lock."""
+        value = getattr(self, name)
+        if value is None:
+            with self._build_lock:
+                value = getattr(self, name)
+                if value is None:
+                    value = build()
+                    setattr(self, name, value)
+        return value
+    
+    @property
+    def moments(self) -> CalorieMomentIndex:
+        return self._lazy('_moments', lambda: CalorieMomentIndex.from_columns(self.columns))
+    
+    @property
+    def cube(self) -> CalorieAggregateCube:
+        return self._lazy('_cube', lambda: CalorieAggregateCube.from_columns(self.columns))
+    
+    @property
+    def top_items(self) -> TopItemsIndex:
+        return self._lazy('_top_items', lambda: TopItemsIndex(self.columns, TOP_ITEM_NUTRIENTS))
+    
+    @property
+    def item_scores(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        rawScore and penalizedScore of every row, aligned with df: the
+        analysis arrays when it has them, else computed from each restaurant's
+        finalCoeffs (NaN when there is no analysis).
+        """
+        return self._lazy('_item_scores', self._compute_item_scores)
+    
+    def _compute_item_scores(self) -> Tuple[np.ndarray, np.ndarray]:
+        items = [r.items for r in self.analysis.restaurants] if self.analysis else []
+        if items and all(isinstance(i, ItemScoreList) for i in items):
+            # Store-wide arrays, memory-mapped when the data came from a snapshot
+            raw, penalized = items[0].raw_scores, items[0].penalized_scores
+        else:
+            columns = self.columns
+            coeffs = np.full((len(columns.restaurants), 5), np.nan)
+            code_of = {name: code for code, name in enumerate(columns.restaurants)}
+            for result in (self.analysis.restaurants if self.analysis else []):
+                coeffs[code_of[result.restaurant]] = result.finalCoeffs
+            raw, penalized = score_items_batched(coeffs[columns.restaurant_codes], columns.values['calories'])
+        raw.flags.writeable = False
+        penalized.flags.writeable = False
+        return raw, penalized
+    
+    def warm(self, like: Optional["Dataset"] = None) -> "Dataset":
+        """Builds the lazy indexes now: those already built on `like`, or all of them."""
+        for name in ('moments', 'cube', 'top_items', 'item_scores'):
+            if like is None or getattr(like, f"_{name}") is not None:
+                getattr(self, name)
+        return self
+
+
+def _record_rows(dataset: Dataset, records: List[FoodRecord]) -> np.ndarray:
+    """
+    Row of one stored copy of each record, searched among the rows of its
+    restaurant with the same calories. Raises ValueError if one is missing.
+    """
+    columns = dataset.columns
+    taken = set()
+    for record in records:
+        key = record_key(record)
+        run = dataset.index.rows(record.restaurant, (record.calories, record.calories))
+        row = next((i for i in range(run.start, run.stop)
+                    if i not in taken and record_key(columns[i]) == key), None)
+        if row is None:
+            raise ValueError(f"Cannot remove records not present for {record.restaurant!r}")
+        taken.add(row)
+    return np.fromiter(taken, dtype=np.intp, count=len(taken))
 
 
 class DataService:
     _instance = None
-    _df: Optional[pd.DataFrame] = None
-    _records: Optional[List[FoodRecord]] = None
-    _analysis: Optional[AnalysisResult] = None
+    _dataset: Optional[Dataset] = None
+    _analyzer: Optional[IncrementalAnalyzer] = None
+    _version: int = 0
+    _filter_cache: LRUCache[pd.DataFrame] = LRUCache(FILTER_CACHE_BYTES, frame_nbytes)
+    # Serializes whole reloads and record updates; readers never take it
+    _update_lock = threading.Lock()
+    # Waiting for the first dataset; see on_first_load
+    _first_load_callbacks: List[Callable[[], None]] = []
     
     def __new__(cls):
         if cls._instance is None:
@@ -23,75 +199,279 @@ class DataService:
         return cls._instance
     
     @property
-    @lru_cache(maxsize=1)
-    def df(self) -> pd.DataFrame:
-        if self._df is None:
+    def dataset(self) -> Dataset:
+        """
+        The current Dataset. Read it once per operation and use that object
+        throughout, so the whole operation sees a single version.
+        """
+        dataset = self._dataset
+        if dataset is None:
             self._load_data()
-        return self._df
+            dataset = self._dataset
+        return dataset
     
     @property
-    def records(self) -> List[FoodRecord]:
-        if self._records is None:
-            self._load_data()
-        return self._records
+    def df(self) -> pd.DataFrame:
+        return self.dataset.df
+    
+    @property
+    def columns(self) -> FoodColumns:
+        return self.dataset.columns
+    
+    @property
+    def records(self) -> Sequence[FoodRow]:
+        """Row views over the columnar store."""
+        return self.columns
     
     @property
     def analysis(self) -> AnalysisResult:
-        if self._analysis is None:
-            self._load_data()
-        return self._analysis
+        return self.dataset.analysis
+    
+    @property
+    def moments(self) -> CalorieMomentIndex:
+        return self.dataset.moments
+    
+    @property
+    def cube(self) -> CalorieAggregateCube:
+        return self.dataset.cube
+    
+    @property
+    def top_items(self) -> TopItemsIndex:
+        return self.dataset.top_items
+    
+    @property
+    def item_scores(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self.dataset.item_scores
+    
+    @property
+    def version(self) -> int:
+        """
+        Version of the current dataset, 0 until it is first loaded. Increases
+        every time the dataset is replaced; part of every cache key.
+        """
+        dataset = self._dataset
+        return dataset.version if dataset is not None else 0
+    
+    @property
+    def filter_cache(self) -> LRUCache[pd.DataFrame]:
+        return self._filter_cache
+    
+    @property
+    def index(self) -> RestaurantCalorieIndex:
+        return self.dataset.index
     
     def _load_data(self):
+        # Single flight: concurrent first requests wait for one load instead of each parsing
+        with self._update_lock:
+            if self._dataset is None:
+                self._publish(self._read_dataset())
+    
+    def _read_dataset(self, key: Optional[str] = None) -> Dataset:
         if not CSV_PATH.exists():
             raise FileNotFoundError(f"CSV not found at {CSV_PATH}")
         
-        with open(CSV_PATH, 'r') as f:
-            csv_text = f.read()
-        
-        self._records = parse_fast_food_csv(csv_text)
-        self._analysis = analyze_fast_food_data(self._records)
-        
-        items_data = []
-        for rec in self._records:
-            items_data.append({
-                'restaurant': rec.restaurant,
-                'item': rec.item,
-                'calories': rec.calories,
-                'sodium': rec.sodium,
-                'saturated_fat': rec.saturated_fat,
-                'trans_fat': rec.trans_fat,
-                'cholesterol': rec.cholesterol,
-                'sugars': rec.sugars,
-                'fiber': rec.fiber,
-                'protein': rec.protein,
-                'vitamin_a': rec.vitamin_a,
-                'vitamin_c': rec.vitamin_c,
-                'calcium': rec.calcium
-            })
-        self._df = pd.DataFrame(items_data)
+        key = key or cached_snapshot_key(CSV_PATH, SNAPSHOT_DIR)
+        snapshot = load_snapshot(SNAPSHOT_DIR, key)
+        columns, analysis = snapshot if snapshot is not None else publish_snapshot(CSV_PATH, SNAPSHOT_DIR, key)
+        return Dataset(columns, analysis, self._version + 1, source_key=key)
+    
+    def _publish(self, dataset: Dataset):
+        """Makes a fully built dataset current; a single assignment, so readers see the old or the new one."""
+        first = self._dataset is None
+        self._version = dataset.version
+        self._dataset = dataset
+        self._analyzer = None
+        self._filter_cache.clear()
+        if first:
+            callbacks, self._first_load_callbacks = self._first_load_callbacks, []
+            for callback in callbacks:
+                callback()
+    
+    def on_first_load(self, callback: Callable[[], None]):
+        """
+        Calls callback once the first dataset is published, whichever of a
+        request, prewarm or the file watcher loads it, or right away if one
+        already is. It runs under _update_lock, so it must not read the data.
+        """
+        with self._update_lock:
+            if self._dataset is None:
+                self._first_load_callbacks.append(callback)
+                return
+        callback()
+    
+    def reload(self) -> bool:
+        """
+        Re-reads the CSV if it changed since the current dataset was loaded.
+        - The CSV is parsed into a new snapshot by a child process, so the
+          parse does not hold the GIL against request threads; this process
+          only maps the result
+        - The new version, with every index the current one had built, is
+          ready before it is published, so requests meanwhile keep using the
+          old one
+        Returns whether a new version was published.
+        """
+        with self._update_lock:
+            current = self._dataset
+            key = cached_snapshot_key(CSV_PATH, SNAPSHOT_DIR)
+            if current is not None and current.source_key == key:
+                return False
+            if load_snapshot(SNAPSHOT_DIR, key) is None:
+                context = multiprocessing.get_context('spawn')
+                with ProcessPoolExecutor(1, mp_context=context) as pool:
+                    pool.submit(_publish_snapshot_process, str(CSV_PATH), str(SNAPSHOT_DIR), key).result()
+            self._publish(self._read_dataset(key).warm(like=current))
+            return True
+    
+    def watch(self, interval: float = 2.0) -> FileWatcher:
+        """Starts a background thread that calls reload() whenever the CSV changes."""
+        return FileWatcher(CSV_PATH, self.reload, interval).start()
+    
+    def update_records(self, added: Iterable[FoodRecord] = (), removed: Iterable[FoodRecord] = ()):
+        """
+        Applies menu changes without re-parsing the CSV.
+        - Removed records are matched to rows of the current store and masked
+          out, added ones appended; the new store is built from arrays
+        - Only restaurants touched by the added/removed records are refit;
+          matching and refitting cost O(changed rows)
+        - End to end it is still O(n) in the catalog: the new version copies
+          the arrays, re-scores every item with the cached fits and rebuilds
+          the indexes, all vectorized (about 0.16 s at 1M rows against 8 s
+          for a cold load)
+        - Raises ValueError, without changing anything, if a removed record
+          is not in the current dataset
+        """
+        added, removed = list(added), list(removed)
+        self.dataset  # the first load takes _update_lock itself
+        with self._update_lock:
+            # Read under the lock, so a reload published meanwhile is built on, not overwritten
+            current = self._dataset
+            keep = np.ones(len(current.columns), dtype=bool)
+            keep[_record_rows(current, removed)] = False
+            analyzer = self._analyzer or IncrementalAnalyzer.from_columns(current.columns)
+            # Dropped until the new version is published, so a failure below cannot leave it out of step
+            self._analyzer = None
+            analyzer.remove_records(removed)
+            analyzer.add_records(added)
+            columns = current.columns.take(keep).concat(FoodColumns.from_records(added)).sorted_by_restaurant()
+            self._publish(Dataset(columns, analyzer.result(columns), self._version + 1).warm(like=current))
+            # _publish drops the analyzer; it stays valid for the version it just produced
+            self._analyzer = analyzer
     
     def get_restaurants(self) -> List[str]:
         return sorted(self.df['restaurant'].unique().tolist())
     
+    def select(self, restaurant: Optional[str] = None,
+               calorie_range: Optional[Tuple[float, float]] = None) -> pd.DataFrame:
+        """
+        Rows of one restaurant (None for all) within an inclusive calorie range.
+        A single restaurant, or all rows, comes back as a zero-copy slice of df.
+        Results are cached per (version, restaurant, calorie_range) in filter_cache.
+        """
+        dataset = self.dataset
+        if calorie_range is not None:
+            calorie_range = (float(calorie_range[0]), float(calorie_range[1]))
+        
+        def compute() -> pd.DataFrame:
+            rows = dataset.index.rows(restaurant, calorie_range)
+            if isinstance(rows, slice):
+                return dataset.df.iloc[rows]
+            return dataset.df.take(rows)
+        
+        return self._filter_cache.get_or_compute((dataset.version, restaurant, calorie_range), compute)
+    
+    def iter_selection(self, restaurant: Optional[str] = None,
+                       calorie_range: Optional[Tuple[float, float]] = None,
+                       chunk_rows: int = 50_000, scores: bool = False) -> Iterator[pd.DataFrame]:
+        """
+        The select(restaurant, calorie_range) rows as DataFrames of at most
+        chunk_rows rows, so exports never hold the whole selection at once;
+        with scores, rawScore and penalizedScore columns are appended.
+        An empty selection still yields one empty chunk, so exports keep their columns.
+        The dataset is pinned when this is called, not when iteration starts.
+        """
+        dataset = self.dataset
+        df = dataset.df
+        rows = dataset.index.rows(restaurant, calorie_range)
+        if isinstance(rows, slice):
+            rows = np.arange(rows.start, rows.stop)
+        raw, penalized = dataset.item_scores if scores else (None, None)
+        
+        def chunks() -> Iterator[pd.DataFrame]:
+            for start in range(0, max(len(rows), 1), chunk_rows):
+                part = rows[start:start + chunk_rows]
+                chunk = df.take(part)
+                if scores:
+                    chunk = chunk.assign(rawScore=raw[part], penalizedScore=penalized[part])
+                yield chunk
+        
+        return chunks()
+    
     def get_items_by_restaurant(self, restaurant: str) -> pd.DataFrame:
-        return self.df[self.df['restaurant'] == restaurant]
+        return self.select(restaurant)
     
     def filter_by_calories(self, min_cal: float, max_cal: float) -> pd.DataFrame:
-        return self.df[(self.df['calories'] >= min_cal) & (self.df['calories'] <= max_cal)]
+        return self.select(calorie_range=(min_cal, max_cal))
+    
+    def get_top_items(self, nutrient: str, k: int = 20, restaurant: Optional[str] = None,
+                      calorie_range: Optional[Tuple[float, float]] = None) -> pd.DataFrame:
+        """
+        The k best items by nutrient among the select(restaurant, calorie_range)
+        rows, best first: lowest for TOP_ITEM_NUTRIENTS marked True, else highest.
+        """
+        if nutrient not in TOP_ITEM_NUTRIENTS:
+            df = self.select(restaurant, calorie_range)
+            return df.nlargest(k, nutrient)
+        dataset = self.dataset
+        return dataset.df.take(dataset.top_items.top(nutrient, k, restaurant, calorie_range))
+    
+    def get_restaurant_means(self, restaurant: Optional[str] = None,
+                             calorie_range: Optional[Tuple[float, float]] = None) -> pd.DataFrame:
+        """
+        Mean of each CUBE_FIELDS column per restaurant over the select() rows,
+        like groupby('restaurant').mean().reset_index(), from the aggregate cube.
+        """
+        cube = self.cube
+        names, means = cube.restaurant_means(restaurant, calorie_range)
+        df = pd.DataFrame(means, columns=cube.fields)
+        df.insert(0, 'restaurant', names)
+        return df
+    
+    def get_calorie_boxes(self, restaurant: Optional[str] = None,
+                          calorie_range: Optional[Tuple[float, float]] = None,
+                          max_outliers: int = BOX_MAX_OUTLIERS) -> List[Dict]:
+        """Per-restaurant calorie box-plot statistics over the select() rows (see box_summary)."""
+        return self.index.calorie_boxes(restaurant, calorie_range, max_outliers)
+    
+    def get_correlation(self, restaurant: Optional[str] = None,
+                        calorie_range: Optional[Tuple[float, float]] = None) -> pd.DataFrame:
+        """Correlation matrix of CUBE_FIELDS over the select() rows, from the aggregate cube."""
+        cube = self.cube
+        return pd.DataFrame(cube.correlation(restaurant, calorie_range), index=cube.fields, columns=cube.fields)
     
     def get_stats(self) -> Dict:
+        df = self.df
         return {
-            'total_items': len(self.df),
-            'total_restaurants': self.df['restaurant'].nunique(),
-            'avg_calories': self.df['calories'].mean(),
-            'avg_sodium': self.df['sodium'].mean(),
-            'avg_protein': self.df['protein'].mean(),
-            'min_calories': self.df['calories'].min(),
-            'max_calories': self.df['calories'].max()
+            'total_items': len(df),
+            'total_restaurants': df['restaurant'].nunique(),
+            'avg_calories': df['calories'].mean(),
+            'avg_sodium': df['sodium'].mean(),
+            'avg_protein': df['protein'].mean(),
+            'min_calories': df['calories'].min(),
+            'max_calories': df['calories'].max()
         }
     
-    def get_restaurant_scores(self) -> List[Dict]:
-        if not self.analysis:
+    def get_restaurant_scores(self, restaurant: Optional[str] = None,
+                              calorie_range: Optional[Tuple[float, float]] = None) -> List[Dict]:
+        """
+        Restaurant health scores, best first.
+        With a restaurant and/or calorie range, the scores are re-fit on the
+        matching items from the calorie-bucketed moment index.
+        """
+        if restaurant is not None or calorie_range is not None:
+            return self.moments.restaurant_scores(calorie_range or (-float('inf'), float('inf')), restaurant)
+        
+        analysis = self.analysis
+        if not analysis:
             return []
         
         return [{
@@ -99,7 +479,7 @@ class DataService:
             'score': r.score,
             'item_count': r.itemCount,
             'coefficients': r.finalCoeffs
-        } for r in self.analysis.restaurants]
+        } for r in analysis.restaurants]
 
 
 data_service = DataService()
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - no cross-process lock off POSIX
+    fcntl = None
+
+from src.analyzer import ANALYSIS_VERSION, AnalysisResult, RestaurantScoreResult
+from src.columnar import NUMERIC_FIELDS, FoodColumns, ItemScoreList
+
+# Bump when the on-disk layout below changes
+# 2: rows stored sorted by restaurant, then calories
+SNAPSHOT_FORMAT = 2
+
+_META_FILE = "meta.json"
+# Last CSV hashed into a key, so later processes can skip re-hashing it
+_SOURCE_FILE = "source.json"
+_LOCK_FILE = ".lock"
+
+
+def snapshot_key(csv_path: Union[str, Path]) -> str:
+    """Content hash of the CSV combined with the analysis and snapshot versions."""
+    with open(csv_path, 'rb') as f:
+        digest = hashlib.file_digest(f, 'sha256').hexdigest()
+    return f"{digest[:32]}-a{ANALYSIS_VERSION}-f{SNAPSHOT_FORMAT}"
+
+
+def cached_snapshot_key(csv_path: Union[str, Path], directory: Union[str, Path]) -> str:
+    """
+    snapshot_key, reused from directory while the CSV's path, size and
+    modification time are unchanged, so processes attaching to an existing
+    snapshot do not read the whole CSV to hash it.
+    """
+    stat = os.stat(csv_path)
+    source = {
+        'path': str(Path(csv_path).resolve()),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'format': SNAPSHOT_FORMAT,
+        'analysis_version': ANALYSIS_VERSION,
+    }
+    source_file = Path(directory) / _SOURCE_FILE
+    try:
+        with open(source_file) as f:
+            stored = json.load(f)
+        key = stored.pop('key', None)
+        if key is not None and stored == source:
+            return key
+    except (OSError, ValueError):
+        pass
+
+    key = snapshot_key(csv_path)
+    try:
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        tmp = source_file.with_name(f".{_SOURCE_FILE}.{os.getpid()}")
+        with open(tmp, 'w') as f:
+            json.dump({**source, 'key': key}, f)
+        os.replace(tmp, source_file)
+    except OSError:
+        pass
+    return key
+
+
+@contextmanager
+def snapshot_lock(directory: Union[str, Path]) -> Iterator[None]:
+    """
+    Exclusive lock across processes on the snapshot directory, so that when
+    several server workers start together one builds the snapshot and the
+    others wait and then map it. Not locked where fcntl is unavailable.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / _LOCK_FILE, 'w') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def save_snapshot(
+    directory: Union[str, Path],
+    key: str,
+    columns: FoodColumns,
+    analysis: Optional[AnalysisResult],
+) -> Path:
+    """
+    Writes the columnar data and analysis as .npy files under directory/key.
+    - analysis must come from analyze_columns(columns)
+    - The snapshot is written to a temporary directory and renamed into
+      place, and older snapshots in directory are removed afterwards
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / key
+    tmp = Path(tempfile.mkdtemp(prefix=f".{key}-", dir=directory))
+
+    try:
+        np.save(tmp / "restaurant_codes.npy", columns.restaurant_codes)
+        np.save(tmp / "item_codes.npy", columns.item_codes)
+        for name in NUMERIC_FIELDS:
+            np.save(tmp / f"{name}.npy", columns.values[name])
+
+        meta = {
+            'format': SNAPSHOT_FORMAT,
+            'analysis_version': ANALYSIS_VERSION,
+            'restaurants': columns.restaurants,
+            'item_names': columns.item_names,
+            'analysis': None,
+        }
+
+        if analysis is not None:
+            item_lists = [r.items for r in analysis.restaurants]
+            if not all(isinstance(items, ItemScoreList) for items in item_lists):
+                raise TypeError("save_snapshot needs an analysis from analyze_columns")
+            rows = [items.rows for items in item_lists]
+            if item_lists:
+                np.save(tmp / "raw_scores.npy", item_lists[0].raw_scores)
+                np.save(tmp / "penalized_scores.npy", item_lists[0].penalized_scores)
+            np.save(tmp / "item_rows.npy", np.concatenate(rows) if rows else np.empty(0, dtype=np.intp))
+            meta['analysis'] = {
+                'minCalories': analysis.minCalories,
+                'maxCalories': analysis.maxCalories,
+                'restaurants': [
+                    {
+                        'restaurant': r.restaurant,
+                        'itemCount': r.itemCount,
+                        'score': r.score,
+                        'finalCoeffs': list(r.finalCoeffs),
+                    }
+                    for r in analysis.restaurants
+                ],
+            }
+
+        with open(tmp / _META_FILE, 'w') as f:
+            json.dump(meta, f)
+
+        if target.exists():
+            shutil.rmtree(target)
+        os.replace(tmp, target)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    for stale in directory.iterdir():
+        if stale.is_dir() and stale.name != key and not stale.name.startswith("."):
+            shutil.rmtree(stale, ignore_errors=True)
+
+    return target
+
+
+def load_snapshot(
+    directory: Union[str, Path],
+    key: str,
+) -> Optional[Tuple[FoodColumns, Optional[AnalysisResult]]]:
+    """
+    Maps a snapshot written by save_snapshot, or returns None if there is none for key.
+    Arrays are read-only memory maps, so nothing is parsed or recomputed.
+    """
+    path = Path(directory) / key
+    try:
+        with open(path / _META_FILE) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('format') != SNAPSHOT_FORMAT or meta.get('analysis_version') != ANALYSIS_VERSION:
+        return None
+
+    def load(name: str) -> np.ndarray:
+        return np.load(path / f"{name}.npy", mmap_mode='r')
+
+    columns = FoodColumns(
+        restaurants=meta['restaurants'],
+        restaurant_codes=load("restaurant_codes"),
+        item_names=meta['item_names'],
+        item_codes=load("item_codes"),
+        values={name: load(name) for name in NUMERIC_FIELDS},
+    )
+
+    stored = meta['analysis']
+    if stored is None:
+        return columns, None
+
+    item_rows = load("item_rows")
+    raw = load("raw_scores") if stored['restaurants'] else None
+    penalized = load("penalized_scores") if stored['restaurants'] else None
+    restaurants = []
+    offset = 0
+    for r in stored['restaurants']:
+        rows = item_rows[offset:offset + r['itemCount']]
+        offset += r['itemCount']
+        restaurants.append(
+            RestaurantScoreResult(
+                restaurant=r['restaurant'],
+                itemCount=r['itemCount'],
+                score=r['score'],
+                finalCoeffs=tuple(r['finalCoeffs']),
+                items=ItemScoreList(columns, rows, raw, penalized),
+            )
+        )
+
+    return columns, AnalysisResult(
+        restaurants=restaurants,
+        minCalories=stored['minCalories'],
+        maxCalories=stored['maxCalories'],
+    )
@@ -0,0 +1,34 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+class StartupProfile:
+    """
+    Wall-clock time of named startup phases, in the order they first ran.
+    - Phases may run on different threads; repeated names accumulate
+    - report() renders a plain-text table for the console
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def report(self) -> str:
+        with self._lock:
+            phases = list(self.phases.items())
+        width = max([len(name) for name, _ in phases] + [len("total")])
+        lines = [f"{name:<{width}}  {seconds * 1000:9.1f} ms" for name, seconds in phases]
+        lines.append(f"{'total':<{width}}  {sum(s for _, s in phases) * 1000:9.1f} ms")
+        return "\n".join(lines)
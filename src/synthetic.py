@@ -0,0 +1,168 @@
+"""
+Deterministic synthetic fast food menus in the fastfood.csv schema, for
+benchmarks at sizes the real file does not reach.
+
+    python -m src.synthetic out.csv --rows 1000000 --restaurants 500 --seed 0
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import List, Union
+
+import numpy as np
+import pandas as pd
+
+FASTFOOD_COLUMNS = [
+    'restaurant', 'item', 'calories', 'cal_fat', 'total_fat', 'sat_fat', 'trans_fat',
+    'cholesterol', 'sodium', 'total_carb', 'fiber', 'sugar', 'protein',
+    'vit_a', 'vit_c', 'calcium', 'salad',
+]
+
+# Rows are generated and written in fixed-size chunks, each from its own
+# seeded stream, so the output depends only on (rows, restaurants, seed)
+CHUNK_ROWS = 100_000
+
+# Share of empty cells, as in fastfood.csv (which the parser reads as 0)
+MISSING_VITAMINS = 0.41
+MISSING_FIBER = 0.02
+MISSING_PROTEIN = 0.002
+
+REAL_RESTAURANTS = ['Mcdonalds', 'Chick Fil-A', 'Sonic', 'Arbys', 'Burger King',
+                    'Dairy Queen', 'Subway', 'Taco Bell']
+_NAME_FIRST = ['Golden', 'Happy', 'Big', 'Red', 'Lucky', 'Sunny', 'Royal', 'Prairie',
+               'Coastal', 'Urban', 'Blue', 'Rocket', 'Silver', 'Old Town', 'Crispy', 'Smoky',
+               'Little', 'Main Street', 'Hometown', 'Northern']
+_NAME_SECOND = ['Grill', 'Burger', 'Chicken', 'Taco', 'Diner', 'Subs', 'Kitchen', 'Shack',
+                'Express', 'Drive-In', 'Wings', 'Pizza', 'Fries', 'Cantina', 'Deli', 'Barn',
+                'Bites', 'Stop', 'Corner', 'Joint']
+_ITEM_STYLE = ['Classic', 'Spicy', 'Crispy', 'Grilled', 'Double', 'Deluxe', 'Bacon', 'BBQ',
+               'Ranch', 'Southwest', 'Honey Mustard', 'Buffalo', 'Cheesy', 'Smokehouse', 'Garden',
+               'Jalapeno', 'Triple', 'Junior', 'Loaded', 'Original']
+_ITEM_FILLING = ['Chicken', 'Beef', 'Turkey', 'Ham', 'Steak', 'Fish', 'Veggie', 'Pork',
+                 'Bean', 'Egg', 'Cheese', 'Shrimp']
+_ITEM_DISH = ['Sandwich', 'Burger', 'Wrap', 'Taco', 'Burrito', 'Salad', 'Sub', 'Melt',
+              'Bowl', 'Nuggets', 'Quesadilla', 'Biscuit', 'Tenders', 'Flatbread']
+
+
+def restaurant_names(n: int) -> List[str]:
+    """The eight real chains first, then made-up unique names."""
+    names = REAL_RESTAURANTS[:n]
+    combos = len(_NAME_FIRST) * len(_NAME_SECOND)
+    for i in range(n - len(names)):
+        name = f"{_NAME_FIRST[i % len(_NAME_FIRST)]} {_NAME_SECOND[(i // len(_NAME_FIRST)) % len(_NAME_SECOND)]}"
+        names.append(name if i < combos else f"{name} {i // combos + 1}")
+    return names
+
+
+class _Profiles:
+    """
+    Per-restaurant menu profile, in the ranges seen across fastfood.csv:
+    - calories: log-normal, median 380-580 kcal, spread 0.35-0.6
+    - calories from fat 30-54% and from protein 16-34%, carbs the rest
+    - sodium 2.0-3.0 mg/kcal; sugar 7-21% of carbs
+    - menu size: log-normal weights, so a few large chains and many small ones
+    """
+
+    def __init__(self, n: int, seed: int):
+        rng = np.random.default_rng([seed, 0])
+        self.calorie_median = rng.uniform(380, 580, n)
+        self.calorie_spread = rng.uniform(0.35, 0.6, n)
+        self.fat_share = rng.uniform(0.30, 0.54, n)
+        self.protein_share = rng.uniform(0.16, 0.34, n)
+        self.sodium_per_kcal = rng.uniform(2.0, 3.0, n)
+        self.sugar_share = rng.uniform(0.07, 0.21, n)
+        weights = rng.lognormal(0.0, 1.0, n)
+        self.weights = weights / weights.sum()
+
+
+def _chunk(profiles: _Profiles, names: np.ndarray, start: int, size: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng([seed, 1, start])
+    n_restaurants = len(names)
+    codes = rng.choice(n_restaurants, size, p=profiles.weights)
+    # The first rows of the file visit every restaurant once, so all of them appear
+    first = np.arange(start, start + size)
+    codes = np.where(first < n_restaurants, first % n_restaurants, codes)
+
+    def per_row(values: np.ndarray) -> np.ndarray:
+        return values[codes]
+
+    calories = np.clip(np.round(rng.lognormal(np.log(per_row(profiles.calorie_median)),
+                                              per_row(profiles.calorie_spread)), -1), 10, 2500)
+    fat_share = np.clip(rng.normal(per_row(profiles.fat_share), 0.1), 0.02, 0.8)
+    protein_share = np.clip(rng.normal(per_row(profiles.protein_share), 0.07), 0.02, 0.6)
+    carb_share = np.clip(1 - fat_share - protein_share + rng.normal(0, 0.03, size), 0.0, 0.9)
+
+    total_fat = np.round(calories * fat_share / 9)
+    sat_fat = np.round(total_fat * np.clip(rng.normal(0.31, 0.1, size), 0, 0.7))
+    trans_fat = np.where(rng.random(size) < 0.55, 0.0,
+                         np.round(sat_fat * rng.uniform(0, 0.15, size) * 2) / 2)
+    total_carb = np.round(calories * carb_share / 4)
+    protein = np.round(calories * protein_share / 4)
+
+    frame = pd.DataFrame({
+        'restaurant': names[codes],
+        'item': [f"{_ITEM_STYLE[a]} {_ITEM_FILLING[b]} {_ITEM_DISH[c]}" for a, b, c in zip(
+            rng.integers(0, len(_ITEM_STYLE), size),
+            rng.integers(0, len(_ITEM_FILLING), size),
+            rng.integers(0, len(_ITEM_DISH), size))],
+        'calories': calories.astype(np.int64),
+        'cal_fat': (np.round(total_fat * 9, -1)).astype(np.int64),
+        'total_fat': total_fat.astype(np.int64),
+        'sat_fat': sat_fat.astype(np.int64),
+        'trans_fat': trans_fat,
+        'cholesterol': (np.round(protein * rng.lognormal(np.log(2.5), 0.4, size) / 5) * 5).astype(np.int64),
+        'sodium': np.round(calories * rng.lognormal(np.log(per_row(profiles.sodium_per_kcal)), 0.3), -1).astype(np.int64),
+        'total_carb': total_carb.astype(np.int64),
+        'fiber': np.round(total_carb * np.clip(rng.normal(0.09, 0.05, size), 0, 0.4)).astype(np.int64),
+        'sugar': np.round(total_carb * np.clip(rng.normal(per_row(profiles.sugar_share), 0.08), 0, 1)).astype(np.int64),
+        'protein': protein.astype(np.int64),
+        'vit_a': np.round(rng.exponential(19, size)).astype(np.int64),
+        'vit_c': np.round(rng.exponential(20, size)).astype(np.int64),
+        'calcium': np.round(rng.exponential(25, size)).astype(np.int64),
+        'salad': 'Other',
+    }, columns=FASTFOOD_COLUMNS)
+
+    for column, share in [('vit_a', MISSING_VITAMINS), ('vit_c', MISSING_VITAMINS),
+                          ('calcium', MISSING_VITAMINS), ('fiber', MISSING_FIBER),
+                          ('protein', MISSING_PROTEIN)]:
+        frame[column] = frame[column].astype('Int64').mask(rng.random(size) < share)
+    return frame
+
+
+def generate_fast_food_csv(
+    path: Union[str, Path],
+    rows: int,
+    restaurants: int = 8,
+    seed: int = 0,
+) -> Path:
+    """
+    Writes a synthetic menu of `rows` items across `restaurants` chains to path.
+    - Same columns as fastfood.csv; each restaurant has its own calorie and
+      nutrient profile (see _Profiles), and vitamin, fiber and protein cells
+      are sometimes empty like in the real file
+    - Every restaurant gets at least one item when rows >= restaurants
+    - Written in CHUNK_ROWS chunks, so memory does not grow with rows
+    - Identical arguments give a byte-identical file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profiles = _Profiles(restaurants, seed)
+    names = np.array(restaurant_names(restaurants), dtype=object)
+    with open(path, 'w', newline='') as f:
+        for start in range(0, rows, CHUNK_ROWS):
+            chunk = _chunk(profiles, names, start, min(CHUNK_ROWS, rows - start), seed)
+            chunk.to_csv(f, header=start == 0, index=False)
+        if rows == 0:
+            f.write(','.join(FASTFOOD_COLUMNS) + '\n')
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Write a synthetic fastfood.csv")
+    parser.add_argument('path')
+    parser.add_argument('--rows', type=lambda v: int(float(v)), default=100_000)
+    parser.add_argument('--restaurants', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    generate_fast_food_csv(args.path, args.rows, args.restaurants, args.seed)
@@ -0,0 +1,80 @@
+"""Parity of the batched analysis engine with the original scalar path."""
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pytest
+
+from src.analyzer import NUTRIENT_KEYS, AnalysisResult, FoodRecord, analyze_fast_food_data, parse_fast_food_csv
+
+CSV_PATH = Path(__file__).parent.parent / "data" / "fastfood.csv"
+
+# Both engines sum the same terms in the same order; the differences left
+# are from the batched solver and closed-form extrema, far below these
+RTOL = 1e-6
+ATOL = 1e-9
+
+
+def record(restaurant: str, item: str, calories: float, **nutrients: float) -> FoodRecord:
+    return FoodRecord(restaurant, item, calories, **{key: nutrients.get(key, 0.0) for key in NUTRIENT_KEYS})
+
+
+def edge_case_records() -> List[FoodRecord]:
+    """
+    - Full: 8 distinct calorie values plus a zero-calorie item
+    - Zero: only zero-calorie items, so nothing to fit
+    - Singular: fewer than 5 distinct calorie values, plus a zero-calorie item
+    """
+    full = [
+        record("Full", f"item {k}", 100.0 * k + 50, sodium=300.0 + 40 * k, protein=5.0 + 3 * k,
+               sugars=float(k), fiber=1.0 + k % 3, calcium=10.0 * k)
+        for k in range(8)
+    ] + [record("Full", "water", 0.0)]
+    zero = [record("Zero", "diet soda", 0.0, sodium=10.0), record("Zero", "water", 0.0)]
+    singular = [
+        record("Singular", "small", 300.0, protein=20.0, sodium=500.0),
+        record("Singular", "small again", 300.0, protein=22.0, sodium=600.0),
+        record("Singular", "large", 450.0, protein=30.0, sodium=900.0),
+        record("Singular", "water", 0.0),
+    ]
+    return full + zero + singular
+
+
+def assert_same_result(batched: AnalysisResult, scalar: AnalysisResult) -> None:
+    assert [r.restaurant for r in batched.restaurants] == [r.restaurant for r in scalar.restaurants]
+    assert batched.minCalories == pytest.approx(scalar.minCalories, rel=RTOL, abs=ATOL)
+    assert batched.maxCalories == pytest.approx(scalar.maxCalories, rel=RTOL, abs=ATOL)
+    for b, s in zip(batched.restaurants, scalar.restaurants):
+        assert b.itemCount == s.itemCount
+        assert b.score == pytest.approx(s.score, rel=RTOL, abs=ATOL)
+        # Higher coefficients are tiny (a4 ~ 1e-12), so they are compared by relative error alone
+        np.testing.assert_allclose(b.finalCoeffs, s.finalCoeffs, rtol=RTOL, atol=0)
+        assert [(i.item.item, i.item.calories) for i in b.items] == [(i.item.item, i.item.calories) for i in s.items]
+        np.testing.assert_allclose([i.rawScore for i in b.items], [i.rawScore for i in s.items], rtol=RTOL, atol=ATOL)
+        np.testing.assert_allclose([i.penalizedScore for i in b.items], [i.penalizedScore for i in s.items],
+                                   rtol=RTOL, atol=ATOL)
+
+
+@pytest.mark.parametrize("sampled_extrema", [False, True])
+def test_batched_matches_scalar_on_fastfood_csv(sampled_extrema):
+    records = parse_fast_food_csv(CSV_PATH.read_text())
+    assert_same_result(
+        analyze_fast_food_data(records, engine="batched", sampled_extrema=sampled_extrema),
+        analyze_fast_food_data(records, engine="scalar", sampled_extrema=sampled_extrema),
+    )
+
+
+@pytest.mark.parametrize("sampled_extrema", [False, True])
+def test_batched_matches_scalar_on_edge_cases(sampled_extrema):
+    records = edge_case_records()
+    batched = analyze_fast_food_data(records, engine="batched", sampled_extrema=sampled_extrema)
+    scalar = analyze_fast_food_data(records, engine="scalar", sampled_extrema=sampled_extrema)
+    assert_same_result(batched, scalar)
+    zero = next(r for r in batched.restaurants if r.restaurant == "Zero")
+    assert zero.finalCoeffs == (0.0, 0.0, 0.0, 0.0, 0.0)
+    assert batched.minCalories == 50.0
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        analyze_fast_food_data(edge_case_records(), engine="simd")
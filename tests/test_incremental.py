@@ -0,0 +1,117 @@
+"""Record updates (IncrementalAnalyzer and DataService.update_records) against a full re-analysis."""
+import shutil
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pytest
+
+from src import services
+from src.analyzer import AnalysisResult, FoodRecord, analyze_fast_food_data, parse_fast_food_csv
+from src.columnar import FoodColumns
+from src.incremental import IncrementalAnalyzer
+
+CSV_PATH = Path(__file__).parent.parent / "data" / "fastfood.csv"
+
+# Power sums updated by subtraction carry rounding a full analysis does not
+RTOL = 1e-6
+ATOL = 1e-6
+
+
+def load_records() -> List[FoodRecord]:
+    return parse_fast_food_csv(CSV_PATH.read_text())
+
+
+def new_records() -> List[FoodRecord]:
+    nutrients = dict(sodium=900.0, saturated_fat=4.0, trans_fat=0.0, cholesterol=60.0, sugars=8.0,
+                     fiber=3.0, protein=25.0, vitamin_a=10.0, vitamin_c=5.0, calcium=15.0)
+    return [
+        FoodRecord("Mcdonalds", "Test Burger", 640.0, **nutrients),
+        FoodRecord("Newcomer", "Wrap", 420.0, **nutrients),
+        FoodRecord("Newcomer", "Bowl", 560.0, **{**nutrients, "protein": 32.0}),
+        FoodRecord("Newcomer", "Salad", 250.0, **{**nutrients, "sodium": 400.0}),
+    ]
+
+
+def item_scores(result: AnalysisResult, restaurant: str) -> np.ndarray:
+    """(calories, rawScore, penalizedScore) of a restaurant's items, in a fixed order."""
+    entry = next(r for r in result.restaurants if r.restaurant == restaurant)
+    rows = sorted((i.item.item, i.item.calories, i.rawScore, i.penalizedScore) for i in entry.items)
+    return np.array([row[1:] for row in rows])
+
+
+def assert_matches_full(result: AnalysisResult, records: List[FoodRecord]) -> None:
+    full = analyze_fast_food_data(records)
+    assert [r.restaurant for r in result.restaurants] == [r.restaurant for r in full.restaurants]
+    assert result.minCalories == full.minCalories
+    assert result.maxCalories == full.maxCalories
+    for got, want in zip(result.restaurants, full.restaurants):
+        assert got.itemCount == want.itemCount
+        assert got.score == pytest.approx(want.score, rel=RTOL, abs=ATOL)
+        np.testing.assert_allclose(got.finalCoeffs, want.finalCoeffs, rtol=1e-5, atol=0)
+        np.testing.assert_allclose(item_scores(result, got.restaurant), item_scores(full, want.restaurant),
+                                   rtol=RTOL, atol=ATOL)
+
+
+def test_analyzer_matches_full_analysis_after_adds_and_removes():
+    records = load_records()
+    analyzer = IncrementalAnalyzer.from_columns(FoodColumns.from_records(records))
+    sonic = [r for r in records if r.restaurant == "Sonic"]
+    removed = sonic + records[:40:3]
+    added = new_records()
+    analyzer.remove_records(removed)
+    analyzer.add_records(added)
+
+    removed_ids = {id(r) for r in removed}
+    remaining = [r for r in records if id(r) not in removed_ids] + added
+    result = analyzer.result(FoodColumns.from_records(remaining).sorted_by_restaurant())
+    assert "Sonic" not in [r.restaurant for r in result.restaurants]
+    assert_matches_full(result, remaining)
+
+
+def test_analyzer_rejects_absent_records_without_changing():
+    records = load_records()
+    columns = FoodColumns.from_records(records).sorted_by_restaurant()
+    analyzer = IncrementalAnalyzer.from_columns(columns)
+    with pytest.raises(ValueError):
+        analyzer.remove_records([records[0], new_records()[1]])
+    assert_matches_full(analyzer.result(columns), records)
+
+
+@pytest.fixture
+def data_service(tmp_path, monkeypatch):
+    """The DataService singleton over a private copy of fastfood.csv."""
+    shutil.copy(CSV_PATH, tmp_path / "fastfood.csv")
+    monkeypatch.setattr(services, "CSV_PATH", tmp_path / "fastfood.csv")
+    monkeypatch.setattr(services, "SNAPSHOT_DIR", tmp_path / "snapshots")
+    service = services.data_service
+    service._dataset = None
+    yield service
+    service._dataset = None
+    service._analyzer = None
+
+
+def test_update_records_matches_full_analysis(data_service):
+    records = load_records()
+    version = data_service.dataset.version
+    sonic = [r for r in records if r.restaurant == "Sonic"]
+    data_service.update_records(removed=sonic)
+    data_service.update_records(added=new_records(), removed=records[:5])
+
+    remaining = [r for r in records if r.restaurant != "Sonic"][5:] + new_records()
+    assert data_service.version == version + 2
+    assert len(data_service.df) == len(remaining)
+    assert "Sonic" not in data_service.get_restaurants()
+    assert "Newcomer" in data_service.get_restaurants()
+    assert len(data_service.select("Newcomer")) == 3
+    assert_matches_full(data_service.analysis, remaining)
+
+
+def test_update_records_rejects_absent_records(data_service):
+    dataset = data_service.dataset
+    with pytest.raises(ValueError):
+        data_service.update_records(added=new_records(), removed=[new_records()[1]])
+    assert data_service.dataset is dataset
+    # The analyzer was not left half-updated by the failed call
+    data_service.update_records(removed=[load_records()[0]])
+    assert_matches_full(data_service.analysis, load_records()[1:])